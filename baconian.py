@@ -2,7 +2,7 @@
 # Author: Steve Dwyer
 # Baconian cipher (with binary columns)
 
-import sys, logger, textwrap, cipher_utils
+import sys, logger, textwrap, cipher_utils, self_test
 
 def binStrtoDecInt(binStr):
 	# Converts a binary representation as a string to a decimal integer
@@ -16,6 +16,39 @@ def binStrtoDecInt(binStr):
 	
 	return int(binStr, base=2)
 
+# Normalises a Baconian binary stream: '0' and '1' become the bits 0 and 1, the row separator '2'
+# becomes ROW_SEPARATOR, and whitespace is deleted
+ROW_SEPARATOR = b'\x02'
+NORMALISE_TABLE = bytes.maketrans(b'012', b'\x00\x01\x02')
+WHITESPACE = b' \t\r\n\x0b\x0c'
+# BIT_TABLES[k] gives each bit of row k of a group its weight, 2**k
+BIT_TABLES = [cipher_utils.makeOrdinalTable({0: 0, 1: 2 ** k}) for k in range(5)]
+# Reduces a 5 bit value mod 26, straight to the ASCII upper case letter
+VALUE_TO_LETTER_TABLE = cipher_utils.makeOrdinalTable(dict((value, 65 + value % 26) for value in range(32)))
+
+def baconianGroupToText(rows):
+	# Converts a group of five rows of bits (bytes of 0 and 1) to a string
+	""" (list) -> str
+	
+	Convert a group of five equal length rows of bits (bytes of 0s and 1s, least significant
+	row first) to a string of upper case characters between A..Z, one per column. The five rows
+	are combined into the column values with one weighted sum over the whole group.
+	
+	>>> baconianGroupToText([b'\\x01\\x00', b'\\x00\\x00', b'\\x00\\x00', b'\\x00\\x01', b'\\x00\\x00'])
+	'BI'
+	"""
+	columns = len(rows[0])
+	values = bytes(columns)
+	for k, row in enumerate(rows):
+		if len(row) != columns:
+			raise ValueError('Baconian group rows differ in length: %s' % ([len(row) for row in rows]))
+		if row.strip(b'\x00\x01'):
+			raise ValueError('Baconian rows may only contain the bits 0 and 1')
+		values = cipher_utils.addOrdinals(values, row.translate(BIT_TABLES[k]))
+	text = values.translate(VALUE_TO_LETTER_TABLE).decode('ascii')
+	logger.debug('%s columns decoded to %s', columns, text)
+	return text
+
 def baconianBinToText(binStrs, sep=''):
 	# Converts a list of Baconian binary (blocksize 5) strings to a string
 	""" (list, str sep='') -> str
@@ -25,74 +58,95 @@ def baconianBinToText(binStrs, sep=''):
 	be be separated by the character sep
 	
 	>>> baconianBinToText(['10', '00', '00', '01', '00'])
-	BI
+	'BI'
 	"""
 	cipherlist = []
-	logger.debug('Bin\tInt\tMod26\tChr')
-	position = 0
-	while position < len(binStrs):
-		for column in range(len(binStrs[position])):
-			binStr = binStrs[position+4][column] + binStrs[position+3][column] + binStrs[position+2][column] + binStrs[position+1][column] + binStrs[position][column]
-			cipherInt = binStrtoDecInt(binStr)
-			moddedCipherInt = cipherInt % 26
-			cipherChar = cipher_utils.integerToChr(moddedCipherInt)
-			modded = ''
-			if cipherInt != moddedCipherInt:
-				modded = ' - modded!'
-			logger.debug('%s\t%s\t%s\t%s\t%s' % (binStr, cipherInt, moddedCipherInt, cipherChar, modded))
-			cipherlist.append(cipherChar)
-		position+=5
+	for position in range(0, len(binStrs), 5):
+		rows = [binStr.encode('ascii').translate(NORMALISE_TABLE) for binStr in binStrs[position:position + 5]]
+		if len(rows[0]) > 0:
+			cipherlist.append(baconianGroupToText(rows))
 		cipherlist.append(sep)
 	return ''.join(cipherlist)
 
+def baconianStreamToText(chunks, sep=''):
+	""" (iterable, str sep='') -> generator
+	
+	Decode a Baconian binary stream arriving as an iterable of chunks (str or bytes) of '0's
+	and '1's, with each row terminated by '2' and any whitespace ignored, yielding the letters
+	of each group of five rows, followed by sep, as soon as the group is complete.
+	Only the current group is ever held in memory.
+	"""
+	partialRow = b''
+	rows = []
+	for chunk in chunks:
+		if isinstance(chunk, str):
+			chunk = chunk.encode('ascii')
+		pieces = (partialRow + chunk.translate(NORMALISE_TABLE, WHITESPACE)).split(ROW_SEPARATOR)
+		partialRow = pieces.pop()
+		for row in pieces:
+			rows.append(row)
+			if len(rows) == 5:
+				yield baconianGroupToText(rows) + sep
+				rows = []
+	if partialRow:
+		rows.append(partialRow)
+	if rows:
+		if len(rows) < 5:
+			raise ValueError('The Baconian stream ended part way through a group of five rows')
+		yield baconianGroupToText(rows) + sep
+
+def decodeBaconianFile(fileName, sep='', chunkSize=65536):
+	""" (str, str sep='', integer) -> generator
+	
+	Decode the Baconian binary file fileName, reading it chunkSize bytes at a time,
+	and yield the letters of each group (see baconianStreamToText)
+	"""
+	file = open(fileName, 'rb')
+	try:
+		for text in baconianStreamToText(iter(lambda: file.read(chunkSize), b''), sep):
+			yield text
+	finally:
+		file.close()
+
 def main():
 	print('Ensure that cipherbin.txt is present in the same directory as baconian.py')
 	input('Hit any key to continue...')
-	print('Reading in file cipherbin.txt and removing all whitespace characters...')
+	print('Decoding file cipherbin.txt a chunk at a time, ignoring all whitespace characters...')
 	import cipher_utils
-	cipherbintext = cipher_utils.stripWhitespace(cipher_utils.readFile('cipherbin.txt'))
 	logger.setLevel(logger.ERROR)
-	logger.debug('%s' % (cipherbintext))
-	cipherbinlist = cipherbintext.split(sep='2')
-	print(cipherbinlist)
-	input('Hit any key to continue...')
-	ciphertext = baconianBinToText(cipherbinlist, sep=' ')
+	ciphertext = ''.join(decodeBaconianFile('cipherbin.txt', sep=' '))
 	logger.info(ciphertext)
 	cipher_utils.writeFile('cipher.txt', ciphertext)
 	print('Let\'s perform some frequency analysis on the ciphertext we extracted from the Baconian binary text...')
 	input('Hit any key to continue...')
 	logger.setLevel(logger.ERROR)
-	ciphertext = cipher_utils.stripWhitespace(cipher_utils.readFile('cipher.txt'))
-	cipherlist=list(ciphertext)
+	cipherlist = cipher_utils.readCipherText('cipher.txt')
 	freq = cipher_utils.frequencyAnalysis(cipherlist)
 	sortedFreq = cipher_utils.sortedFrequency(freq)
 	cipher_utils.displayFrequency(sortedFreq)
 	print('ioc = %s' % (cipher_utils.ioc(cipherlist)))
-	print('Let\'s decrypt the ciphertext using the Simple Substitution Cipher decryption algorithm, with our guessed key...')
+	print('Let\'s recover the Simple Substitution Cipher key by hill climbing, and decrypt the ciphertext with it...')
 	input('Hit any key to continue...')
+	import simple_sub
 	ciphertext = cipher_utils.readFile('cipher.txt')
+	fitness, keyString = simple_sub.solveSimpleSubstitution(ciphertext)
+	print('key = %s (fitness %s)' % (keyString, fitness))
 	logger.setLevel(logger.DEBUG)
-	plaintext = cipher_utils.decryptSimpleSubstitutionCipher(ciphertext, 'DIJAKLMNFOPQECRSTUVWXYZGBH', dummy='.')
+	plaintext = simple_sub.decryptSimpleSubstitutionCipher(ciphertext, keyString, dummy='.')
 	print(plaintext)
 	cipher_utils.writeFile('solution.txt', plaintext)
 	logger.setLevel(logger.ERROR)
 
-# Always perform a sanity check first:
-print('Checking decryption logic on baconian module...')
-logger.setLevel(logger.ERROR)
-
-if binStrtoDecInt('00111011') != 59:
-	print('Error testing binStrtoDecInt(bin) method!!! Check your code before continuing...')
-	sys.exit()
-elif baconianBinToText(['10', '00', '00', '01', '00']) != 'BI':
-	print('Error testing baconianBinToText(binStrs) method!!! Check your code before continuing...')
-	sys.exit()
-else:
-	print('decryption logic OK.')
-logger.setLevel(logger.ERROR)
+# Sanity checks, run on demand by self_test
+@self_test.register('decryption logic')
+def _selfTestDecryption():
+	self_test.check(binStrtoDecInt('00111011') == 59, 'binStrtoDecInt(bin)')
+	self_test.check(baconianBinToText(['10', '00', '00', '01', '00']) == 'BI', 'baconianBinToText(binStrs)')
 
 # if baconian.py is run, instead of being imported as a module,
 # call the main() function
 
 if __name__ == '__main__':
+	if '--self-test' in sys.argv:
+		self_test.main(['baconian'])
 	main()
@@ -0,0 +1,136 @@
+# benchmarks.py
+# Author: Steve Dwyer
+# Timings of the cipher modules, run on demand:
+# python benchmarks.py [benchmark ...]
+
+import sys, io, math, contextlib, subprocess, time
+
+# The modules whose import time is benchmarked
+IMPORT_MODULES = ['cipher_utils', 'vigenere', 'simple_sub', 'bifid', 'hill', 'baconian', 'ngram_score']
+
+def timeImport(moduleName, repeats=7):
+	""" (str, integer) -> float
+
+	Return the best of repeats timings, in milliseconds, of a fresh interpreter importing the
+	module moduleName, less the best timing of a fresh interpreter which imports nothing
+	"""
+	def bestTime(source):
+		timings = []
+		for _ in range(repeats):
+			start = time.perf_counter()
+			subprocess.run([sys.executable, '-c', source], check=True, stdout=subprocess.DEVNULL)
+			timings.append(time.perf_counter() - start)
+		return min(timings) * 1000
+	return bestTime('import %s' % (moduleName)) - bestTime('pass')
+
+def benchmarkImportTime(modules=IMPORT_MODULES, repeats=7):
+	""" (list, integer) -> list
+
+	Print and return a list of (module name, milliseconds) tuples, the time taken to import each module
+	"""
+	results = []
+	for moduleName in modules:
+		milliseconds = timeImport(moduleName, repeats)
+		print('import %s\t%.1f ms' % (moduleName, milliseconds))
+		results.append((moduleName, milliseconds))
+	return results
+
+def benchmarkKeyGeneration(modulusSizes=(1024, 2048, 4096), keys=2, processes=None):
+	""" (list, integer, integer) -> list
+	
+	Print and return a list of (modulus size, keys per minute) tuples, generating keys RSA key pairs
+	whose modulus n = p * q has each of the modulusSizes in bits. make_rsa_keys.generateKey takes the
+	size of p and q, so it is passed half of each modulus size.
+	"""
+	import make_rsa_keys
+	results = []
+	for modulusSize in modulusSizes:
+		start = time.perf_counter()
+		for _ in range(keys):
+			# generateKey reports its progress on stdout, which would swamp the results
+			with contextlib.redirect_stdout(io.StringIO()):
+				make_rsa_keys.generateKey(modulusSize // 2, processes)
+		keysPerMinute = keys * 60 / (time.perf_counter() - start)
+		print('%s bit keys (%s bit p and q)\t%.1f keys/minute' % (modulusSize, modulusSize // 2, keysPerMinute))
+		results.append((modulusSize, keysPerMinute))
+	return results
+
+def benchmarkPublicOperations(keySize=1024, blocks=50, processes=None):
+	""" (integer, integer, integer) -> list
+	
+	Print and return a list of (public exponent, blocks per second) tuples, the throughput of public
+	key operations (rsa_cipher.encryptBlocks with the public key) under a key of keySize bits generated
+	with a random keySize bit e, and under one generated with make_rsa_keys.PUBLIC_EXPONENT
+	"""
+	import random, make_rsa_keys, rsa_cipher
+	results = []
+	for publicExponent, label in ((None, 'random e'), (make_rsa_keys.PUBLIC_EXPONENT, 'e = %s' % (make_rsa_keys.PUBLIC_EXPONENT))):
+		with contextlib.redirect_stdout(io.StringIO()):
+			publicKey, privateKey = make_rsa_keys.generateKey(keySize, processes, publicExponent)
+		blockInts = [random.randrange(publicKey[0]) for _ in range(blocks)]
+		start = time.perf_counter()
+		rsa_cipher.encryptBlocks(blockInts, publicKey)
+		blocksPerSecond = blocks / (time.perf_counter() - start)
+		print('%s bit key, %s\t%.1f blocks/second' % (keySize, label, blocksPerSecond))
+		results.append((publicKey[1], blocksPerSecond))
+	return results
+
+def _legacyListPrimes(sieveSize):
+	# The original prime_sieve.listPrimes, with its list of bools and crossing off from 2 * i
+	# for every i (prime or not), kept here as the baseline for benchmarkPrimeSieve
+	sieve = [True] * sieveSize
+	sieve[0] = False
+	sieve[1] = False
+	for i in range(2, int(math.sqrt(sieveSize)) + 1):
+		pointer = i * 2
+		while pointer < sieveSize:
+			sieve[pointer] = False
+			pointer += i
+	return [i for i in range(sieveSize) if sieve[i]]
+
+def benchmarkPrimeSieve(limits=(10**6, 10**7, 10**8, 10**9), legacyLimit=10**7):
+	""" (list, integer) -> list
+	
+	Print and return a list of (limit, legacy seconds, segmented seconds) tuples, the time taken to
+	enumerate every prime below each limit with the original list-based sieve and with the segmented
+	prime_sieve.iterPrimes. The original sieve holds eight bytes per number, and takes minutes beyond
+	10**7, so it is skipped (None) for limits above legacyLimit.
+	"""
+	import prime_sieve
+	results = []
+	for limit in limits:
+		legacySeconds = None
+		if limit <= legacyLimit:
+			start = time.perf_counter()
+			_legacyListPrimes(limit)
+			legacySeconds = time.perf_counter() - start
+		start = time.perf_counter()
+		count = sum(1 for _ in prime_sieve.iterPrimes(limit))
+		seconds = time.perf_counter() - start
+		if legacySeconds is None:
+			print('primes below %.0e\t%s primes\tlegacy skipped\tsegmented %.2f s' % (limit, count, seconds))
+		else:
+			print('primes below %.0e\t%s primes\tlegacy %.2f s\tsegmented %.2f s' % (limit, count, legacySeconds, seconds))
+		results.append((limit, legacySeconds, seconds))
+	return results
+
+# Benchmarks which can be run from the command line, by name
+BENCHMARKS = {
+	'import': benchmarkImportTime,
+	'keygen': benchmarkKeyGeneration,
+	'public': benchmarkPublicOperations,
+	'sieve': benchmarkPrimeSieve
+}
+
+def main():
+	# Runs the benchmarks named on the command line, or all of them
+	names = sys.argv[1:] or sorted(BENCHMARKS)
+	for name in names:
+		if name not in BENCHMARKS:
+			sys.exit('Unknown benchmark %s: choose from %s' % (name, ', '.join(sorted(BENCHMARKS))))
+		print('Benchmark: %s' % (name))
+		BENCHMARKS[name]()
+
+# If benchmarks.py is run (instead of imported as a module), call the main() function
+if __name__ == '__main__':
+	main()
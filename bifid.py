@@ -1,7 +1,7 @@
 # bifid.py
 # Author: Steve Dwyer
 
-import sys, logger, cipher_utils
+import sys, math, random, logger, cipher_utils, ngram_score, self_test
 
 def displayKeySquare(keyString):
 	n = 0
@@ -28,38 +28,56 @@ def checkKey(keyString):
 		if not char.isalpha():
 			logger.error('Key Square contains non-alphabetic characters!')
 			return False
-	logger.debug(displayKeySquare(keyString))
+	if logger.isEnabledFor(logger.DEBUG):
+		logger.debug(displayKeySquare(keyString))
 	return True
 
 def formatKeyString(keyString):
 	keyString = keyString.upper()
 	return keyString
 
+# Translation table merging J into I, as the 5x5 key square has no J
+J_TO_I_TABLE = cipher_utils.makeOrdinalTable(dict((i, 8 if i == 9 else i) for i in range(26)))
+# Translation table from a key square row (0..4) to the first position in that row
+ROW_TO_POSITION_TABLE = cipher_utils.makeOrdinalTable(dict((row, row * 5) for row in range(5)))
+
 def formatMessage(charList):
-	charList = charList.upper()
-	charList.replace('J', 'I')
-	return charList
+	# Returns the message as a CipherText of letters only, with J merged into I
+	return cipher_utils.CipherText(charList).letters().translate(J_TO_I_TABLE)
+
+def getKeySquareTables(keyString):
+	# Returns the translation tables from an ordinal to its row and column in the key square,
+	# and from a key square position (0..24) back to an ordinal
+	keyOrdinals = cipher_utils.CipherText(keyString).ordinals
+	rowTable = cipher_utils.makeOrdinalTable(dict((ordinal, position // 5) for position, ordinal in enumerate(keyOrdinals)))
+	colTable = cipher_utils.makeOrdinalTable(dict((ordinal, position % 5) for position, ordinal in enumerate(keyOrdinals)))
+	positionTable = cipher_utils.makeOrdinalTable(dict(enumerate(keyOrdinals)))
+	return rowTable, colTable, positionTable
 
 def getCoordsFromKeySquareChars(charList, keyString):
 	coords = []
+	debugEnabled = logger.isEnabledFor(logger.DEBUG)
 	for char in charList:
 		absCoord = keyString.find(char)
 		xCoord = absCoord // 5
 		yCoord = absCoord % 5
 		charCoords = [xCoord, yCoord]
-		logger.debug('%s = %s' % (char, charCoords))
+		if debugEnabled:
+			logger.debug('%s = %s', char, charCoords)
 		coords.append(charCoords)
-	logger.debug('coords = %s' % (coords))
+	logger.debug('coords = %s', coords)
 	return coords
 
 def getCharsFromKeySquareCoords(fractionatedCoords, keyString):
 	charList = []
+	debugEnabled = logger.isEnabledFor(logger.DEBUG)
 	for charCoords in fractionatedCoords:
 		charIndex = charCoords[0] * 5 + charCoords[1]
 		char = keyString[charIndex]
-		logger.debug('%s = %s' % (char, charCoords))
+		if debugEnabled:
+			logger.debug('%s = %s', char, charCoords)
 		charList.append(char)
-	logger.debug('charList = %s' % (charList))
+	logger.debug('charList = %s', charList)
 	return ''.join(charList)
 
 def defractionate(coords, period):
@@ -72,13 +90,13 @@ def defractionate(coords, period):
 		periodElementNr += 1
 		if periodElementNr == period or n == len(coords) -1:
 			# period is full, or end of text reached: defractionate
-			logger.debug('fractionatedBlock = %s' % (fractionatedBlock))
+			logger.debug('fractionatedBlock = %s', fractionatedBlock)
 			periodCoords = []
 			for elementNr in range(periodElementNr):
 				charCoords = [fractionatedBlock[elementNr], fractionatedBlock[elementNr + periodElementNr]]
 				periodCoords.append(charCoords)
 				defractionatedCoords.append(charCoords)
-			logger.debug('defractionated period coords = %s' % (periodCoords))
+			logger.debug('defractionated period coords = %s', periodCoords)
 			periodElementNr = 0
 			fractionatedBlock = []
 	return defractionatedCoords
@@ -94,29 +112,58 @@ def fractionate(coords, period):
 		periodElementNr += 1
 		if periodElementNr == period or n == len(coords) -1:
 			# period is full, or end of text reached: fractionate
-			logger.debug('periodCoords = %s %s' % (periodCoordsLeft, periodCoordsRight))
+			logger.debug('periodCoords = %s %s', periodCoordsLeft, periodCoordsRight)
 			fractionatedBlock = periodCoordsLeft + periodCoordsRight
-			logger.debug('fractionated block = %s' % (fractionatedBlock))
+			logger.debug('fractionated block = %s', fractionatedBlock)
 			fractionatedPeriodCoords = []
 			for elementNr in range(0, len(fractionatedBlock), 2):
 				charCoords = [fractionatedBlock[elementNr], fractionatedBlock[elementNr +1]]
 				fractionatedPeriodCoords.append(charCoords)
 				fractionatedCoords.append(charCoords)
-			logger.debug('fractionated period coords = %s' % (fractionatedPeriodCoords))
+			logger.debug('fractionated period coords = %s', fractionatedPeriodCoords)
 			periodElementNr = 0
 			periodCoordsLeft = []
 			periodCoordsRight = []
 	return fractionatedCoords
 
+def defractionateOrdinals(rows, cols, period):
+	# The same as defractionate, but working on buffers of the rows and columns of the coords
+	interleaved = bytearray(len(rows) * 2)
+	interleaved[0::2] = rows
+	interleaved[1::2] = cols
+	defractionatedRows = bytearray()
+	defractionatedCols = bytearray()
+	for blockStart in range(0, len(interleaved), period * 2):
+		fractionatedBlock = interleaved[blockStart:blockStart + period * 2]
+		periodLength = len(fractionatedBlock) // 2
+		defractionatedRows += fractionatedBlock[:periodLength]
+		defractionatedCols += fractionatedBlock[periodLength:]
+	logger.debug('defractionated %s coords with period %s', len(rows), period)
+	return bytes(defractionatedRows), bytes(defractionatedCols)
+
+def fractionateOrdinals(rows, cols, period):
+	# The same as fractionate, but working on buffers of the rows and columns of the coords
+	fractionatedBlocks = bytearray()
+	for blockStart in range(0, len(rows), period):
+		fractionatedBlocks += rows[blockStart:blockStart + period]
+		fractionatedBlocks += cols[blockStart:blockStart + period]
+	logger.debug('fractionated %s coords with period %s', len(rows), period)
+	return bytes(fractionatedBlocks[0::2]), bytes(fractionatedBlocks[1::2])
+
 def bifid(charList, keyString, period, operation):
+	# Looks up the key square coords of the whole message at once, applies operation
+	# (fractionateOrdinals or defractionateOrdinals) and converts the coords back to letters.
+	# charList may be a str, a list of characters or a cipher_utils.CipherText
 	keyString = formatKeyString(keyString)
 	if not checkKey(keyString):
 		return None
-	charList = formatMessage(charList)
-	coords = getCoordsFromKeySquareChars(charList, keyString)
-	fractionatedCoords = operation(coords, period)
-	ciphertext = getCharsFromKeySquareCoords(fractionatedCoords, keyString)
-	return ciphertext
+	cipherText = formatMessage(charList)
+	rowTable, colTable, positionTable = getKeySquareTables(keyString)
+	rows = cipherText.ordinals.translate(rowTable)
+	cols = cipherText.ordinals.translate(colTable)
+	rows, cols = operation(rows, cols, period)
+	positions = cipher_utils.addOrdinals(rows.translate(ROW_TO_POSITION_TABLE), cols)
+	return cipher_utils.CipherText.fromOrdinals(positions.translate(positionTable)).toText()
 
 def encryptBifid(charList, keyString, period):
 	""" (list, str, int) -> str
@@ -127,8 +174,8 @@ def encryptBifid(charList, keyString, period):
 	>>> encryptBifid('defendtheeastwallofthecastle', 'phqgmeaylnofdxkrcvszwbuti', 5)
 	FFYHMKHYCPLIASHADTRLHCCHLBLR
 	"""
-	ciphertext = bifid(charList, keyString, period, fractionate).upper()
-	logger.info('%s' % (ciphertext))
+	ciphertext = bifid(charList, keyString, period, fractionateOrdinals).upper()
+	logger.info('%s', ciphertext)
 	return ciphertext
 
 def decryptBifid(charList, keyString, period):
@@ -140,16 +187,136 @@ def decryptBifid(charList, keyString, period):
 	>>> decryptBifid('FFYHMKHYCPLIASHADTRLHCCHLBLR', 'phqgmeaylnofdxkrcvszwbuti', 5)
 	defendtheeastwallofthecastle
 	"""
-	plaintext = bifid(charList, keyString, period, defractionate).lower()
-	logger.info('%s' % (plaintext))
+	plaintext = bifid(charList, keyString, period, defractionateOrdinals).lower()
+	logger.info('%s', plaintext)
 	return plaintext
 
+# The 25 ordinals which can appear in a key square (every letter but J)
+KEY_SQUARE_ORDINALS = bytes(ordinal for ordinal in range(26) if ordinal != 9)
+
+class BifidDecryptor:
+	"""
+	Decrypts one ciphertext with a given period under any number of key squares.
+	
+	Defractionation moves coordinates to the same places whatever the key, so the work is
+	done once, when the decryptor is constructed: each plaintext letter's row comes from the
+	row or column of one ciphertext letter and its column from the row or column of another.
+	Those two letters are recorded as codes (ordinal + 26 if the column is wanted), so that
+	decrypting under a key square is then just a few translations of the whole text at once.
+	"""
+	
+	def __init__(self, charList, period):
+		"""
+		Constructs a new BifidDecryptor for the ciphertext charList with the given period
+		"""
+		self.period = period
+		ordinals = formatMessage(charList).ordinals
+		rowCodes = bytearray()
+		colCodes = bytearray()
+		for blockStart in range(0, len(ordinals), period):
+			periodLength = min(period, len(ordinals) - blockStart)
+			for elementNr in range(periodLength):
+				for codes, coordNr in ((rowCodes, elementNr), (colCodes, elementNr + periodLength)):
+					codes.append(ordinals[blockStart + coordNr // 2] + 26 * (coordNr % 2))
+		self.rowCodes = bytes(rowCodes)
+		self.colCodes = bytes(colCodes)
+	
+	def decrypt(self, keyOrdinals):
+		""" (bytes) -> bytes
+		
+		Return the plaintext ordinals, decrypted with the key square keyOrdinals
+		(the 25 ordinals of the key square, row by row)
+		"""
+		rowTable = bytearray(256)
+		colTable = bytearray(256)
+		for position, ordinal in enumerate(keyOrdinals):
+			row, col = divmod(position, 5)
+			rowTable[ordinal] = row * 5
+			rowTable[ordinal + 26] = col * 5
+			colTable[ordinal] = row
+			colTable[ordinal + 26] = col
+		positions = cipher_utils.addOrdinals(self.rowCodes.translate(rowTable), self.colCodes.translate(colTable))
+		return positions.translate(keyOrdinals.ljust(256, b'\0'))
+
+def mutateKeySquare(keyOrdinals, generator):
+	# Returns a copy of the key square with two cells, two rows or two columns swapped, or transposed
+	key = bytearray(keyOrdinals)
+	move = generator.random()
+	if move < 0.9:
+		x, y = generator.sample(range(25), 2)
+		key[x], key[y] = key[y], key[x]
+	elif move < 0.95:
+		x, y = generator.sample(range(5), 2)
+		key[x * 5:x * 5 + 5], key[y * 5:y * 5 + 5] = key[y * 5:y * 5 + 5], key[x * 5:x * 5 + 5]
+	elif move < 0.99:
+		x, y = generator.sample(range(5), 2)
+		key[x::5], key[y::5] = key[y::5], key[x::5]
+	else:
+		key = bytearray(key[col * 5 + row] for row in range(5) for col in range(5))
+	return bytes(key)
+
+def solveBifidPeriod(charList, period, iterations=40000, seed=None):
+	""" (list, integer, integer, integer) -> tuple
+	
+	Search for the key square of the Bifid ciphertext charList with the given period by
+	simulated annealing over cell, row and column swaps and transposition, scoring each
+	candidate plaintext with the English trigram table.
+	Return a (score, keyString, period, plaintext) tuple for the best key square found.
+	"""
+	generator = random.Random(seed)
+	scorer = ngram_score.englishNgramTable(3)
+	decryptor = BifidDecryptor(charList, period)
+	key = bytes(generator.sample(KEY_SQUARE_ORDINALS, 25))
+	score = scorer.score(decryptor.decrypt(key))
+	bestScore, bestKey = score, key
+	# Score differences grow with the length of the text, so the temperature does too
+	startTemperature = max(len(decryptor.rowCodes), 100) / 25
+	for iteration in range(iterations):
+		temperature = startTemperature * (1 - iteration / iterations) + 0.01
+		candidateKey = mutateKeySquare(key, generator)
+		candidateScore = scorer.score(decryptor.decrypt(candidateKey))
+		difference = candidateScore - score
+		if difference >= 0 or generator.random() < math.exp(difference / temperature):
+			key, score = candidateKey, candidateScore
+			if score > bestScore:
+				bestScore, bestKey = score, key
+	keyString = cipher_utils.CipherText.fromOrdinals(bestKey).toText()
+	plaintext = cipher_utils.CipherText.fromOrdinals(decryptor.decrypt(bestKey)).toLower()
+	logger.info('period %s: score %s, key %s', period, bestScore, keyString)
+	return (bestScore, keyString, period, plaintext)
+
+def _solveBifidPeriodArgs(args):
+	# Unpacks the arguments of solveBifidPeriod, for Pool.map
+	return solveBifidPeriod(*args)
+
+def solveBifid(charList, periods=range(2, 11), iterations=40000, processes=None, seed=None):
+	""" (list, list, integer, integer, integer) -> tuple
+	
+	Search for the key square and period of the Bifid ciphertext charList, running
+	solveBifidPeriod for each of the candidate periods on a pool of processes
+	(processes defaults to the number of CPUs).
+	Return a (score, keyString, period, plaintext) tuple for the best solution found.
+	"""
+	ciphertext = formatMessage(charList).toText()
+	tasks = [(ciphertext, period, iterations, None if seed is None else seed + period) for period in periods]
+	# Build the trigram table before starting the workers, so they all map the same file
+	ngram_score.englishNgramTable(3)
+	# multiprocessing is imported only when needed, as it is slow to import
+	import multiprocessing
+	pool = multiprocessing.Pool(processes)
+	try:
+		results = pool.map(_solveBifidPeriodArgs, tasks)
+	finally:
+		pool.close()
+		pool.join()
+	return max(results)
+
 def main():
 	import cipher_utils
 	print('Ensure that plaintext.txt is present in the same directory as bifid.py')
 	input('Hit any key to continue...')
-	print('Reading in file plaintext.txt and removing all whitespace characters...')
-	plaintext = cipher_utils.stripWhitespace(cipher_utils.readFile('plaintext.txt'))
+	print('Reading in the letters of file plaintext.txt, reading J as I...')
+	plaintext = cipher_utils.readCipherText('plaintext.txt', mapJToI=True)
 	logger.setLevel(logger.ERROR)
 	print(plaintext)
 	print('Ready to encrypt')
@@ -161,41 +328,34 @@ def main():
 	logger.setLevel(logger.ERROR)
 	print('Ensure that cipher.txt is present in the same directory as bifid.py')
 	input('Hit any key to continue...')
-	print('Reading in file cipher.txt and removing all whitespace characters...')
-	ciphertext = cipher_utils.stripWhitespace(cipher_utils.readFile('cipher.txt'))
+	print('Reading in the letters of file cipher.txt, reading J as I...')
+	ciphertext = cipher_utils.readCipherText('cipher.txt', mapJToI=True)
 	logger.setLevel(logger.ERROR)
 	print(ciphertext)
-	print('Ready to decrypt')
+	print('Ready to search for the key square and period, and decrypt')
 	input('Hit any key to continue...')
 	logger.setLevel(logger.ERROR)
-	plaintext = decryptBifid(ciphertext, 'LIGOABCDEFHKMNPQRSTUVWXYZ', 4)
+	score, keyString, period, plaintext = solveBifid(ciphertext)
+	print('key square (period %s):%s' % (period, displayKeySquare(keyString)))
 	print(plaintext)
 	cipher_utils.writeFile('solution.txt', plaintext)
 	logger.setLevel(logger.ERROR)
 
-# Always perform a sanity check first on the known example cipher:
-print('Checking encryption logic on bifid module...')
-logger.setLevel(logger.ERROR)
-if encryptBifid('defen', 'phqgmeaylnofdxkrcvszwbuti', 5) != 'FFYHM':
-	print('Error testing encryptBifid(charList, keyString, period) method!!! Check your code before continuing...')
-	sys.exit()
-if encryptBifid('defendtheeastwallofthecastle', 'phqgmeaylnofdxkrcvszwbuti', 5) != 'FFYHMKHYCPLIASHADTRLHCCHLBLR':
-	print('Error testing encryptBifid(charList, keyString, period) method!!! Check your code before continuing...')
-	sys.exit()
-print('encryption logic OK.')
-print('Checking decryption logic on bifid module...')
-logger.setLevel(logger.ERROR)
-if decryptBifid('FFYHM', 'phqgmeaylnofdxkrcvszwbuti', 5) != 'defen':
-	print('Error testing decryptBifid(charList, keyString, period) method!!! Check your code before continuing...')
-	sys.exit()
-if decryptBifid('FFYHMKHYCPLIASHADTRLHCCHLBLR', 'phqgmeaylnofdxkrcvszwbuti', 5) != 'defendtheeastwallofthecastle':
-	print('Error testing decryptBifid(charList, keyString, period) method!!! Check your code before continuing...')
-	sys.exit()
-print('decryption logic OK.')
-logger.setLevel(logger.ERROR)
+# Sanity checks on the known example cipher, run on demand by self_test
+@self_test.register('encryption logic')
+def _selfTestEncryption():
+	self_test.check(encryptBifid('defen', 'phqgmeaylnofdxkrcvszwbuti', 5) == 'FFYHM', 'encryptBifid(charList, keyString, period)')
+	self_test.check(encryptBifid('defendtheeastwallofthecastle', 'phqgmeaylnofdxkrcvszwbuti', 5) == 'FFYHMKHYCPLIASHADTRLHCCHLBLR', 'encryptBifid(charList, keyString, period)')
+
+@self_test.register('decryption logic')
+def _selfTestDecryption():
+	self_test.check(decryptBifid('FFYHM', 'phqgmeaylnofdxkrcvszwbuti', 5) == 'defen', 'decryptBifid(charList, keyString, period)')
+	self_test.check(decryptBifid('FFYHMKHYCPLIASHADTRLHCCHLBLR', 'phqgmeaylnofdxkrcvszwbuti', 5) == 'defendtheeastwallofthecastle', 'decryptBifid(charList, keyString, period)')
 
 # if bifid.py is run, instead of being imported as a module,
 # call the main() function
 
 if __name__ == '__main__':
+	if '--self-test' in sys.argv:
+		self_test.main(['bifid'])
 	main()
@@ -1,7 +1,7 @@
 # cipher_utils.py
 # Author: Steve Dwyer
 
-import sys, logger
+import sys, os, mmap, array, heapq, itertools, collections, logger, self_test
 
 def readFile(fileName):
 	file = open(fileName)
@@ -75,13 +75,11 @@ def frequencyAnalysis(charList):
 	>>> frequencyAnalysis(['X', 'S', 'F', 'J', 'D', 'J', 'M', 'N', 'R', 'F', 'R', 'U', 'D', 'J', 'V', 'L', 'M', 'Y', 'F', 'T', 'G', 'W', 'W', 'H', 'P', 'T', 'U', 'D', 'I', 'A', 'H', 'W', 'R', 'M', 'S', 'X', 'X', 'A', 'H', 'J', 'D', 'N', 'B', 'R', 'H', 'Q', 'T', 'O', 'F', 'F', 'N', 'W', 'F', 'G', 'H', 'G', 'L', 'D', 'J', 'J', 'A', 'T', 'Q', 'W', 'H', 'U', 'E', 'Q', 'E', 'M', 'D', 'M', 'H', 'R', 'H', 'L', 'M', 'C', 'G', 'L', 'Z', 'A', 'Y', 'B', 'T', 'H', 'U', 'W', 'I', 'C', 'M', 'H', 'D', 'J', 'I', 'C', 'G', 'F', 'V', 'Z', 'T', 'J', 'H', 'W', 'R', 'F', 'Y', 'B', 'X', 'B', 'H', 'T', 'T', 'L', 'X', 'A', 'H', 'F', 'L', 'Y', 'M', 'H', 'D', 'K', 'M', 'Z', 'K', 'T', 'P', 'S', 'S', 'U', 'M', 'R', 'H', 'F', 'H', 'L', 'R', 'U', 'W', 'A', 'T', 'H', 'U', 'J', 'V', 'L', 'T', 'Q', 'L', 'Z', 'S', 'G', 'S', 'N', 'A', 'F', 'W', 'L', 'W', 'U', 'G', 'X', 'D', 'U', 'Y', 'C', 'H', 'S', 'W', 'Z', 'J', 'W', 'H', 'S', 'I', 'A', 'I', 'Y', 'G', 'Y', 'L', 'S', 'Q', 'C', 'M', 'D', 'D', 'F', 'I', 'M', 'X', 'H', 'X', 'J', 'N', 'N', 'R', 'Y', 'R', 'E', 'F', 'E', 'X', 'N', 'W', 'H', 'T', 'M', 'L', 'N', 'E', 'D', 'J', 'C', 'Y', 'D', 'R', 'M', 'H', 'I', 'G', 'X', 'L', 'V', 'J', 'L', 'X', 'Q', 'H', 'U', 'Y', 'L', 'H', 'S', 'L', 'U', 'Y', 'L', 'T', 'S', 'V', 'S', 'H', 'N', 'B', 'T', 'Q', 'K', 'F', 'H', 'W', 'T', 'Q', 'D', 'N', 'H', 'X', 'U', 'D', 'Q', 'R', 'Y', 'G', 'Y', 'V', 'S', 'Q', 'F', 'M', 'M', 'R', 'K', 'J', 'Q', 'H', 'Z', 'O', 'V', 'S', 'I', 'M', 'G', 'H', 'H', 'T', 'M', 'L', 'N', 'E', 'D', 'J', 'Q', 'B', 'Y', 'K', 'G', 'Z', 'N', 'X', 'S', 'F', 'J', 'D', 'J', 'M', 'N', 'R', 'F', 'X', 'U', 'B', 'I', 'G', 'J', 'R', 'U', 'K', 'P', 'P', 'S', 'S', 'O', 'E', 'N', 'V', 'S', 'X', 'Y', 'G', 'N', 'R', 'J', 'Q', 'Y', 'V', 'Y', 'X', 'J', 'J', 'L', 'B', 'S', 'F', 'J', 'D', 'J', 'M', 'T', 'J', 'J', 'F', 'J', 'A', 'D', 'D', 'L', 'Y', 'B', 'X', 'Z', 'Q', 'A', 'A', 'Y', 'K', 'X', 'L', 'L', 'D', 'I', 'Y', 'X', 'X', 'J', 'W', 'Y', 'R', 'F', 'W', 'A', 'Y', 'M', 'L', 'N', 'P', 'H', 'Q', 'Y', 'L', 'Y', 'H', 'F', 'H', 'L', 'R', 'U', 'W', 'A', 'T', 'H', 'B', 'X', 'D', 'D', 'Q', 'U', 'U', 'T', 'X', 'L', 'Y', 'L', 'T', 'S', 'V', 'X', 'T', 'L', 'F', 'N', 'Q', 'Y', 'N', 'H', 'M', 'J', 'O', 'D', 'N', 'A', 'B', 'G', 'O', 'W', 'S', 'O', 'F', 'G', 'H', 'J', 'X', 'I', 'K', 'Y', 'H', 'P', 'Y', 'M', 'H', 'Z', 'Q', 'V', 'X', 'U', 'G', 'I', 'L', 'E', 'F', 'A', 'X', 'X', 'L', 'F', 'Y', 'I', 'T', 'X', 'W', 'J', 'J', 'U', 'F', 'T', 'I', 'F', 'T', 'H', 'L', 'J', 'Q', 'K', 'J', 'N', 'A', 'J', 'U', 'W', 'F', 'L', 'X', 'R', 'D', 'F', 'D', 'G', 'T', 'S', 'B', 'O', 'F', 'S', 'L', 'Y', 'R', 'H', 'J', 'L', 'Y', 'T', 'U', 'E', 'Y', 'B', 'T', 'Y', 'W', 'J', 'F', 'H', 'L', 'K', 'R', 'J', 'R', 'U', 'M', 'N', 'R', 'F', 'X', 'I', 'F', 'J', 'V', 'L', 'W', 'U', 'B', 'L', 'K', 'L', 'K', 'I', 'K', 'B', 'D', 'J', 'I', 'U', 'G', 'I', 'V', 'G', 'R', 'Y', 'O', 'J', 'U', 'Q', 'H', 'I', 'F', 'U', 'O', 'W', 'C', 'G', 'H', 'X', 'W', 'A', 'S', 'P', 'H', 'Q', 'Y', 'W', 'X', 'Q', 'T', 'U', 'S', 'A', 'S', 'A', 'E', 'J', 'W', 'L', 'J', 'L', 'L', 'K', 'R', 'J', 'S', 'O', 'F', 'G', 'H', 'J', 'X', 'U', 'G', 'I', 'X', 'K', 'J', 'G', 'T', 'Y', 'K', 'K', 'Y', 'I', 'W', 'T', 'W', 'Z', 'J', 'N', 'K', 'F', 'Q', 'K', 'K', 'I', 'K', 'R', 'D', 'L', 'N', 'I', 'G', 'M', 'R', 'O', 'J', 'P', 'X', 'W', 'Q', 'G', 'R', 'U', 'M', 'Y', 'H', 'J', 'B', 'B', 'B', 'H', 'K', 'E', 'J', 'N', 'A', 'T', 'G', 'A', 'X', 'O', 'L', 'J', 'G', 'L', 'M', 'Y', 'K', 'J', 'V', 'M', 'Q', 'N', 'B', 'S', 'J', 'K', 'H', 'L', 'T', 'R', 'E', 'D', 'J', 'X', 'W', 'F', 'W', 'S', 'X', 'N', 'K', 'J', 'D', 'E', 'X', 'B', 'H', 'Z', 'O', 'V', 'L', 'C', 'O', 'J', 'Q', 'G', 'M', 'C', 'G', 'Y', 'V', 'S', 'G', 'I', 'N', 'Y', 'K', 'G', 'B', 'C', 'M', 'B', 'D', 'K', 'J', 'H', 'V', 'W', 'B', 'H', 'Y', 'Y', 'W', 'I', 'X', 'J', 'N', 'H', 'Z', 'B', 'R', 'J', 'Q', 'X', 'P', 'F', 'U', 'A', 'N', 'N', 'A', 'J', 'D', 'D', 'Q', 'C', 'X', 'X', 'V', 'U', 'T', 'L', 'X', 'I', 'V', 'G', 'R', 'Y', 'G', 'T', 'W', 'S', 'G', 'F', 'X', 'A', 'L', 'U', 'Y', 'I', 'K', 'N', 'H', 'K', 'F', 'A', 'T', 'N', 'Q', 'K', 'Y', 'N', 'A', 'J', 'J', 'W', 'W', 'G', 'T', 'S', 'V', 'T', 'J', 'W', 'T', 'Z', 'V', 'W', 'Y', 'B', 'X', 'N', 'U', 'W', 'S', 'W', 'K', 'D', 'S', 'L', 'N', 'I', 'G', 'X', 'B', 'K', 'Y', 'Y', 'F', 'X', 'G', 'A', 'I', 'H', 'H', 'Y', 'V', 'M', 'K', 'Z', 'B', 'H', 'L', 'W', 'S', 'N', 'E', 'D', 'V', 'U', 'W', 'U', 'F', 'G', 'O', 'W', 'R', 'Y', 'L', 'X', 'D', 'Y', 'J', 'M', 'K', 'N', 'J', 'G', 'W', 'I', 'N', 'X', 'P', 'S', 'Y', 'B', 'X', 'R', 'D', 'L', 'N', 'W', 'T', 'Q', 'D', 'F', 'F', 'F', 'R', 'X', 'L', 'K', 'G', 'S', 'T', 'Q', 'O', 'A', 'J', 'X', 'V', 'T', 'G', 'W', 'H', 'L', 'T', 'H', 'N', 'W', 'W', 'M', 'E', 'F', 'L', 'V', 'G', 'U', 'K', 'J', 'S', 'S', 'Y', 'N', 'X', 'W', 'Q', 'K', 'M', 'C', 'W', 'I', 'H', 'F', 'B', 'C', 'M', 'M', 'L', 'F', 'Y', 'B', 'X', 'R', 'H', 'K', 'X', 'U', 'Z', 'J', 'V', 'S', 'S', 'X', 'N', 'X', 'H', 'V', 'Y', 'B', 'X', 'R', 'W', 'G', 'W', 'Y', 'V', 'W', 'H', 'S', 'Y', 'Y', 'M', 'M', 'H', 'E', 'F', 'W', 'A', 'N', 'Q', 'W', 'Z', 'M', 'X', 'I', 'W', 'G', 'J', 'H', 'V', 'W', 'B', 'H', 'Y', 'N', 'A', 'J', 'P', 'L', 'M', 'I', 'L', 'J', 'F', 'G', 'I', 'Y', 'L', 'W', 'H', 'N', 'T', 'F', 'O', 'J', 'G', 'S', 'W', 'I', 'N', 'S', 'G', 'L', 'M', 'Y', 'N', 'X', 'H', 'G', 'K', 'M', 'X', 'H', 'U', 'W', 'Y', 'E', 'X', 'D', 'V', 'L', 'M', 'U', 'M', 'B', 'H', 'J', 'J', 'M', 'A', 'F', 'U', 'W', 'I', 'U', 'F', 'T', 'Q', 'Y', 'Y', 'B', 'H', 'X', 'H', 'O', 'M', 'I', 'G', 'J', 'H', 'V', 'J', 'X', 'M', 'T', 'F', 'G', 'R', 'G', 'N', 'S', 'L', 'U', 'F', 'N', 'X', 'X', 'H', 'U', 'Z', 'L', 'X', 'Q', 'B', 'L', 'M', 'Y', 'L', 'J', 'D', 'J', 'J', 'E', 'G', 'T', 'Z', 'F', 'F', 'M', 'L', 'D', 'P', 'E', 'J', 'N', 'K', 'N', 'F', 'W', 'S', 'W', 'K', 'D', 'S', 'L', 'N', 'I', 'G', 'X', 'B', 'K', 'Y', 'Y', 'F', 'X', 'D', 'F', 'I', 'B', 'T', 'A', 'H', 'S', 'B', 'Y', 'T', 'P', 'Q', 'W', 'X', 'M', 'B', 'S', 'W', 'Z', 'F', 'N', 'X', 'A', 'H', 'J', 'D', 'I', 'G', 'J', 'L', 'F', 'A', 'I', 'E', 'A', 'H', 'V', 'M', 'U', 'L', 'Y', 'R', 'H', 'T', 'M', 'L', 'J', 'V', 'K', 'Y', 'B', 'X', 'X', 'D', 'E', 'J', 'M', 'X', 'Y', 'R', 'X', 'X', 'Y', 'V', 'W', 'H', 'L', 'P', 'Y', 'R', 'X'])
 	{'U': 44, 'W': 66, 'O': 18, 'X': 78, 'V': 34, 'J': 83, 'B': 40, 'Y': 74, 'M': 53, 'L': 71, 'D': 45, 'N': 53, 'F': 62, 'Z': 19, 'I': 41, 'G': 55, 'Q': 36, 'T': 49, 'P': 14, 'K': 43, 'H': 78, 'S': 49, 'C': 13, 'R': 40, 'E': 21, 'A': 35}
 	"""
-	charFrequencies = {}
-	for char in charList:
-		if char in charFrequencies:
-			charFrequencies[char] += 1
-		else:
-			charFrequencies[char] = 1
-	return charFrequencies
+	if isinstance(charList, CipherText):
+		counts = countNgrams(charList, 1)
+		return dict((UPPERCASE[ordinal], count) for ordinal, count in enumerate(counts) if count)
+	# Counter tallies in C, keeping each character in order of its first appearance
+	return dict(collections.Counter(charList))
 
 def sortedFrequency(charFrequencies):
 	# Returns a sorted list of the frequency of characters from a dictionary containing the letters and their frequencies
@@ -92,13 +90,9 @@ def sortedFrequency(charFrequencies):
 	>>> sortedFrequency({'U': 44, 'W': 66, 'O': 18, 'X': 78, 'V': 34, 'J': 83, 'B': 40, 'Y': 74, 'M': 53, 'L': 71, 'D': 45, 'N': 53, 'F': 62, 'Z': 19, 'I': 41, 'G': 55, 'Q': 36, 'T': 49, 'P': 14, 'K': 43, 'H': 78, 'S': 49, 'C': 13, 'R': 40, 'E': 21, 'A': 35})
 	[(83, ['J']), (78, ['X', 'H']), (74, ['Y']), (71, ['L']), (66, ['W']), (62, ['F']), (55, ['G']), (53, ['M', 'N']), (49, ['T', 'S']), (45, ['D']), (44, ['U']), (43, ['K']), (41, ['I']), (40, ['B', 'R']), (36, ['Q']), (35, ['A']), (34, ['V']), (21, ['E']), (19, ['Z']), (18, ['O']), (14, ['P']), (13, ['C'])]
 	"""
-	sortedFrequency = {}
-	for char, freq in charFrequencies.items():
-		if freq in sortedFrequency:
-			sortedFrequency[freq].append(char)
-		else:
-			sortedFrequency[freq] = [char]
-	return sorted(list(sortedFrequency.items()), reverse=True)
+	# A stable sort keeps characters of the same frequency in their original order
+	items = sorted(charFrequencies.items(), key=lambda item: item[1], reverse=True)
+	return [(freq, [char for char, _ in group]) for freq, group in itertools.groupby(items, key=lambda item: item[1])]
 
 def ioc(charList):
 	# Calculates the Index of Coincidence for the list of characters charList
@@ -109,19 +103,25 @@ def ioc(charList):
 	>>> ioc(['X', 'S', 'F', 'J', 'D', 'J', 'M', 'N', 'R', 'F', 'R', 'U', 'D', 'J', 'V', 'L', 'M', 'Y', 'F', 'T', 'G', 'W', 'W', 'H', 'P', 'T', 'U', 'D', 'I', 'A', 'H', 'W', 'R', 'M', 'S', 'X', 'X', 'A', 'H', 'J', 'D', 'N', 'B', 'R', 'H', 'Q', 'T', 'O', 'F', 'F', 'N', 'W', 'F', 'G', 'H', 'G', 'L', 'D', 'J', 'J', 'A', 'T', 'Q', 'W', 'H', 'U', 'E', 'Q', 'E', 'M', 'D', 'M', 'H', 'R', 'H', 'L', 'M', 'C', 'G', 'L', 'Z', 'A', 'Y', 'B', 'T', 'H', 'U', 'W', 'I', 'C', 'M', 'H', 'D', 'J', 'I', 'C', 'G', 'F', 'V', 'Z', 'T', 'J', 'H', 'W', 'R', 'F', 'Y', 'B', 'X', 'B', 'H', 'T', 'T', 'L', 'X', 'A', 'H', 'F', 'L', 'Y', 'M', 'H', 'D', 'K', 'M', 'Z', 'K', 'T', 'P', 'S', 'S', 'U', 'M', 'R', 'H', 'F', 'H', 'L', 'R', 'U', 'W', 'A', 'T', 'H', 'U', 'J', 'V', 'L', 'T', 'Q', 'L', 'Z', 'S', 'G', 'S', 'N', 'A', 'F', 'W', 'L', 'W', 'U', 'G', 'X', 'D', 'U', 'Y', 'C', 'H', 'S', 'W', 'Z', 'J', 'W', 'H', 'S', 'I', 'A', 'I', 'Y', 'G', 'Y', 'L', 'S', 'Q', 'C', 'M', 'D', 'D', 'F', 'I', 'M', 'X', 'H', 'X', 'J', 'N', 'N', 'R', 'Y', 'R', 'E', 'F', 'E', 'X', 'N', 'W', 'H', 'T', 'M', 'L', 'N', 'E', 'D', 'J', 'C', 'Y', 'D', 'R', 'M', 'H', 'I', 'G', 'X', 'L', 'V', 'J', 'L', 'X', 'Q', 'H', 'U', 'Y', 'L', 'H', 'S', 'L', 'U', 'Y', 'L', 'T', 'S', 'V', 'S', 'H', 'N', 'B', 'T', 'Q', 'K', 'F', 'H', 'W', 'T', 'Q', 'D', 'N', 'H', 'X', 'U', 'D', 'Q', 'R', 'Y', 'G', 'Y', 'V', 'S', 'Q', 'F', 'M', 'M', 'R', 'K', 'J', 'Q', 'H', 'Z', 'O', 'V', 'S', 'I', 'M', 'G', 'H', 'H', 'T', 'M', 'L', 'N', 'E', 'D', 'J', 'Q', 'B', 'Y', 'K', 'G', 'Z', 'N', 'X', 'S', 'F', 'J', 'D', 'J', 'M', 'N', 'R', 'F', 'X', 'U', 'B', 'I', 'G', 'J', 'R', 'U', 'K', 'P', 'P', 'S', 'S', 'O', 'E', 'N', 'V', 'S', 'X', 'Y', 'G', 'N', 'R', 'J', 'Q', 'Y', 'V', 'Y', 'X', 'J', 'J', 'L', 'B', 'S', 'F', 'J', 'D', 'J', 'M', 'T', 'J', 'J', 'F', 'J', 'A', 'D', 'D', 'L', 'Y', 'B', 'X', 'Z', 'Q', 'A', 'A', 'Y', 'K', 'X', 'L', 'L', 'D', 'I', 'Y', 'X', 'X', 'J', 'W', 'Y', 'R', 'F', 'W', 'A', 'Y', 'M', 'L', 'N', 'P', 'H', 'Q', 'Y', 'L', 'Y', 'H', 'F', 'H', 'L', 'R', 'U', 'W', 'A', 'T', 'H', 'B', 'X', 'D', 'D', 'Q', 'U', 'U', 'T', 'X', 'L', 'Y', 'L', 'T', 'S', 'V', 'X', 'T', 'L', 'F', 'N', 'Q', 'Y', 'N', 'H', 'M', 'J', 'O', 'D', 'N', 'A', 'B', 'G', 'O', 'W', 'S', 'O', 'F', 'G', 'H', 'J', 'X', 'I', 'K', 'Y', 'H', 'P', 'Y', 'M', 'H', 'Z', 'Q', 'V', 'X', 'U', 'G', 'I', 'L', 'E', 'F', 'A', 'X', 'X', 'L', 'F', 'Y', 'I', 'T', 'X', 'W', 'J', 'J', 'U', 'F', 'T', 'I', 'F', 'T', 'H', 'L', 'J', 'Q', 'K', 'J', 'N', 'A', 'J', 'U', 'W', 'F', 'L', 'X', 'R', 'D', 'F', 'D', 'G', 'T', 'S', 'B', 'O', 'F', 'S', 'L', 'Y', 'R', 'H', 'J', 'L', 'Y', 'T', 'U', 'E', 'Y', 'B', 'T', 'Y', 'W', 'J', 'F', 'H', 'L', 'K', 'R', 'J', 'R', 'U', 'M', 'N', 'R', 'F', 'X', 'I', 'F', 'J', 'V', 'L', 'W', 'U', 'B', 'L', 'K', 'L', 'K', 'I', 'K', 'B', 'D', 'J', 'I', 'U', 'G', 'I', 'V', 'G', 'R', 'Y', 'O', 'J', 'U', 'Q', 'H', 'I', 'F', 'U', 'O', 'W', 'C', 'G', 'H', 'X', 'W', 'A', 'S', 'P', 'H', 'Q', 'Y', 'W', 'X', 'Q', 'T', 'U', 'S', 'A', 'S', 'A', 'E', 'J', 'W', 'L', 'J', 'L', 'L', 'K', 'R', 'J', 'S', 'O', 'F', 'G', 'H', 'J', 'X', 'U', 'G', 'I', 'X', 'K', 'J', 'G', 'T', 'Y', 'K', 'K', 'Y', 'I', 'W', 'T', 'W', 'Z', 'J', 'N', 'K', 'F', 'Q', 'K', 'K', 'I', 'K', 'R', 'D', 'L', 'N', 'I', 'G', 'M', 'R', 'O', 'J', 'P', 'X', 'W', 'Q', 'G', 'R', 'U', 'M', 'Y', 'H', 'J', 'B', 'B', 'B', 'H', 'K', 'E', 'J', 'N', 'A', 'T', 'G', 'A', 'X', 'O', 'L', 'J', 'G', 'L', 'M', 'Y', 'K', 'J', 'V', 'M', 'Q', 'N', 'B', 'S', 'J', 'K', 'H', 'L', 'T', 'R', 'E', 'D', 'J', 'X', 'W', 'F', 'W', 'S', 'X', 'N', 'K', 'J', 'D', 'E', 'X', 'B', 'H', 'Z', 'O', 'V', 'L', 'C', 'O', 'J', 'Q', 'G', 'M', 'C', 'G', 'Y', 'V', 'S', 'G', 'I', 'N', 'Y', 'K', 'G', 'B', 'C', 'M', 'B', 'D', 'K', 'J', 'H', 'V', 'W', 'B', 'H', 'Y', 'Y', 'W', 'I', 'X', 'J', 'N', 'H', 'Z', 'B', 'R', 'J', 'Q', 'X', 'P', 'F', 'U', 'A', 'N', 'N', 'A', 'J', 'D', 'D', 'Q', 'C', 'X', 'X', 'V', 'U', 'T', 'L', 'X', 'I', 'V', 'G', 'R', 'Y', 'G', 'T', 'W', 'S', 'G', 'F', 'X', 'A', 'L', 'U', 'Y', 'I', 'K', 'N', 'H', 'K', 'F', 'A', 'T', 'N', 'Q', 'K', 'Y', 'N', 'A', 'J', 'J', 'W', 'W', 'G', 'T', 'S', 'V', 'T', 'J', 'W', 'T', 'Z', 'V', 'W', 'Y', 'B', 'X', 'N', 'U', 'W', 'S', 'W', 'K', 'D', 'S', 'L', 'N', 'I', 'G', 'X', 'B', 'K', 'Y', 'Y', 'F', 'X', 'G', 'A', 'I', 'H', 'H', 'Y', 'V', 'M', 'K', 'Z', 'B', 'H', 'L', 'W', 'S', 'N', 'E', 'D', 'V', 'U', 'W', 'U', 'F', 'G', 'O', 'W', 'R', 'Y', 'L', 'X', 'D', 'Y', 'J', 'M', 'K', 'N', 'J', 'G', 'W', 'I', 'N', 'X', 'P', 'S', 'Y', 'B', 'X', 'R', 'D', 'L', 'N', 'W', 'T', 'Q', 'D', 'F', 'F', 'F', 'R', 'X', 'L', 'K', 'G', 'S', 'T', 'Q', 'O', 'A', 'J', 'X', 'V', 'T', 'G', 'W', 'H', 'L', 'T', 'H', 'N', 'W', 'W', 'M', 'E', 'F', 'L', 'V', 'G', 'U', 'K', 'J', 'S', 'S', 'Y', 'N', 'X', 'W', 'Q', 'K', 'M', 'C', 'W', 'I', 'H', 'F', 'B', 'C', 'M', 'M', 'L', 'F', 'Y', 'B', 'X', 'R', 'H', 'K', 'X', 'U', 'Z', 'J', 'V', 'S', 'S', 'X', 'N', 'X', 'H', 'V', 'Y', 'B', 'X', 'R', 'W', 'G', 'W', 'Y', 'V', 'W', 'H', 'S', 'Y', 'Y', 'M', 'M', 'H', 'E', 'F', 'W', 'A', 'N', 'Q', 'W', 'Z', 'M', 'X', 'I', 'W', 'G', 'J', 'H', 'V', 'W', 'B', 'H', 'Y', 'N', 'A', 'J', 'P', 'L', 'M', 'I', 'L', 'J', 'F', 'G', 'I', 'Y', 'L', 'W', 'H', 'N', 'T', 'F', 'O', 'J', 'G', 'S', 'W', 'I', 'N', 'S', 'G', 'L', 'M', 'Y', 'N', 'X', 'H', 'G', 'K', 'M', 'X', 'H', 'U', 'W', 'Y', 'E', 'X', 'D', 'V', 'L', 'M', 'U', 'M', 'B', 'H', 'J', 'J', 'M', 'A', 'F', 'U', 'W', 'I', 'U', 'F', 'T', 'Q', 'Y', 'Y', 'B', 'H', 'X', 'H', 'O', 'M', 'I', 'G', 'J', 'H', 'V', 'J', 'X', 'M', 'T', 'F', 'G', 'R', 'G', 'N', 'S', 'L', 'U', 'F', 'N', 'X', 'X', 'H', 'U', 'Z', 'L', 'X', 'Q', 'B', 'L', 'M', 'Y', 'L', 'J', 'D', 'J', 'J', 'E', 'G', 'T', 'Z', 'F', 'F', 'M', 'L', 'D', 'P', 'E', 'J', 'N', 'K', 'N', 'F', 'W', 'S', 'W', 'K', 'D', 'S', 'L', 'N', 'I', 'G', 'X', 'B', 'K', 'Y', 'Y', 'F', 'X', 'D', 'F', 'I', 'B', 'T', 'A', 'H', 'S', 'B', 'Y', 'T', 'P', 'Q', 'W', 'X', 'M', 'B', 'S', 'W', 'Z', 'F', 'N', 'X', 'A', 'H', 'J', 'D', 'I', 'G', 'J', 'L', 'F', 'A', 'I', 'E', 'A', 'H', 'V', 'M', 'U', 'L', 'Y', 'R', 'H', 'T', 'M', 'L', 'J', 'V', 'K', 'Y', 'B', 'X', 'X', 'D', 'E', 'J', 'M', 'X', 'Y', 'R', 'X', 'X', 'Y', 'V', 'W', 'H', 'L', 'P', 'Y', 'R', 'X'])
 	0.04472688108370197
 	"""
-	logger.info('Calculating ioc for %s chars = %s' % (len(charList), ''.join(charList)))
-	charFrequencies = frequencyAnalysis(charList)
+	logger.info('Calculating ioc for %s chars', len(charList))
+	return iocFromCounts(CipherText(charList).letterCounts(), len(charList))
+
+def iocFromCounts(letterCounts, n=None):
+	""" (list, integer) -> float
+	
+	Calculate the Index of Coincidence of a text of n characters (by default, the total
+	of letterCounts) from the list of 26 counts of each letter A..Z in it
+	
+	>>> iocFromCounts([2, 2] + [0] * 24)
+	0.3333333333333333
+	"""
+	if n is None:
+		n = sum(letterCounts)
+	if n < 2:
+		return 0.0
 	ioc = 0
-	n = len(charList)
-	for ordinal in (range(0, 26)):
-		letter = ordinalToClearLetter(ordinal).upper()
-		if letter in charFrequencies:
-			F = charFrequencies[letter]
-		else:
-			F = 0
-		iocLetter = (F**2 - F) / (n**2 - n)
-		ioc += iocLetter
-		logger.debug('%s : %s\t: cumulative: %s' % (letter, iocLetter, ioc))
+	for F in letterCounts:
+		ioc += (F * F - F) / (n * n - n)
 	return ioc
 
 def displayFrequency(sortedList):
@@ -129,18 +129,556 @@ def displayFrequency(sortedList):
 	for item in sortedList:
 		print('%s : %s' % (item[0], item[1]))
 
-# Always perform a sanity check first on the known example cipher:
-print('Checking logic on cipher_utils module...')
-logger.setLevel(logger.ERROR)
-if integerToChr(7) != 'H':
-	print('Error testing integerToChr(cipherInt) method!!! Check your code before continuing...')
-	sys.exit()
-else:
-	print('logic OK.')
-logger.setLevel(logger.ERROR)
+# Ordinal held in a CipherText buffer for any character which is not a letter
+NON_LETTER = 255
+
+UPPERCASE = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+LOWERCASE = 'abcdefghijklmnopqrstuvwxyz'
+
+def makeOrdinalTable(mapping):
+	# Returns a 256 byte translation table for bytes.translate(), mapping each byte
+	# listed in the dictionary mapping to its value and every other byte to NON_LETTER
+	""" (dictionary) -> bytes
+	
+	Return a 256 byte translation table, mapping each key in mapping to its value,
+	and every other byte value to NON_LETTER
+	
+	>>> b'\\x00\\x01\\xff'.translate(makeOrdinalTable({0: 1, 1: 0}))
+	b'\\x01\\x00\\xff'
+	"""
+	table = bytearray([NON_LETTER]) * 256
+	for byte, value in mapping.items():
+		table[byte] = value
+	return bytes(table)
+
+# Translation tables between ASCII letters and ordinals (A/a = 0 ... Z/z = 25)
+ENCODE_TABLE = makeOrdinalTable(dict([(65 + i, i) for i in range(26)] + [(97 + i, i) for i in range(26)]))
+# SHIFT_TABLES[s] adds s (mod 26) to every ordinal, MULTIPLY_TABLES[k] multiplies every ordinal by k (mod 26)
+SHIFT_TABLES = [makeOrdinalTable(dict((i, (i + s) % 26) for i in range(26))) for s in range(26)]
+MULTIPLY_TABLES = [makeOrdinalTable(dict((i, (i * k) % 26) for i in range(26))) for k in range(26)]
+# MOD26_TABLE reduces any sum of ordinals below NON_LETTER back to an ordinal
+MOD26_TABLE = makeOrdinalTable(dict((i, i % 26) for i in range(NON_LETTER)))
+
+def addOrdinals(left, right):
+	# Adds two equal length ordinal buffers byte by byte, as one big integer addition
+	""" (bytes, bytes) -> bytes
+	
+	Return the byte by byte sum of the equal length buffers left and right.
+	Every sum must be less than 256, as the addition is performed on the whole
+	buffer at once as a single integer, so reduce the result with MOD26_TABLE
+	before summing more than nine buffers of ordinals.
+	
+	>>> addOrdinals(b'\\x01\\x19', b'\\x02\\x19')
+	b'\\x032'
+	"""
+	total = int.from_bytes(left, 'big') + int.from_bytes(right, 'big')
+	return total.to_bytes(len(left), 'big')
+
+class CipherText:
+	"""
+	A compact text buffer, holding each letter as its ordinal (A = 0 ... Z = 25) in
+	a bytes object, one byte per character. Any other character is held as
+	NON_LETTER, and remembered by its position in the dictionary nonLetters so it
+	can be restored when the text is decoded.
+	
+	>>> cipherText = CipherText('AB C')
+	>>> cipherText.ordinals
+	b'\\x00\\x01\\xff\\x02'
+	>>> cipherText.toText()
+	'AB C'
+	"""
+	
+	def __init__(self, text):
+		"""
+		Constructs a new CipherText from text, which may be a str, a list of
+		characters, ASCII bytes or another CipherText
+		"""
+		if isinstance(text, CipherText):
+			self.ordinals = text.ordinals
+			self.nonLetters = text.nonLetters
+			return
+		if isinstance(text, (bytes, bytearray)):
+			self.ordinals = bytes(text).translate(ENCODE_TABLE)
+			text = text.decode('latin-1')
+		else:
+			if not isinstance(text, str):
+				text = ''.join(text)
+			self.ordinals = text.encode('latin-1', 'replace').translate(ENCODE_TABLE)
+		self.nonLetters = {}
+		position = self.ordinals.find(NON_LETTER)
+		while position != -1:
+			self.nonLetters[position] = text[position]
+			position = self.ordinals.find(NON_LETTER, position + 1)
+	
+	@classmethod
+	def fromOrdinals(cls, ordinals, nonLetters=None):
+		"""
+		Constructs a new CipherText directly from a buffer of ordinals, without copying it
+		"""
+		cipherText = cls.__new__(cls)
+		cipherText.ordinals = ordinals
+		cipherText.nonLetters = nonLetters if nonLetters is not None else {}
+		return cipherText
+	
+	def __len__(self):
+		return len(self.ordinals)
+	
+	def __iter__(self):
+		# Iterate over upper case characters, so a CipherText can stand in for a list of characters
+		return iter(self.toText())
+	
+	def __getitem__(self, index):
+		# A single position returns its character, a slice returns a new CipherText
+		if isinstance(index, slice):
+			positions = range(len(self.ordinals))[index]
+			nonLetters = {}
+			for position, char in self.nonLetters.items():
+				if position in positions:
+					nonLetters[positions.index(position)] = char
+			return CipherText.fromOrdinals(self.ordinals[index], nonLetters)
+		ordinal = self.ordinals[index]
+		if ordinal == NON_LETTER:
+			return self.nonLetters[range(len(self.ordinals))[index]]
+		return UPPERCASE[ordinal]
+
+	def __str__(self):
+		return self.toText()
+	
+	def __repr__(self):
+		return 'CipherText(%r)' % (self.toText())
+	
+	def letters(self):
+		""" () -> CipherText
+		
+		Return a CipherText holding only the letters of this text
+		
+		>>> CipherText('AB C').letters().toText()
+		'ABC'
+		"""
+		if not self.nonLetters:
+			return self
+		return CipherText.fromOrdinals(self.ordinals.replace(bytes([NON_LETTER]), b''))
+	
+	def column(self, index, k):
+		""" (integer, integer) -> memoryview
+		
+		Return a zero-copy view of every kth ordinal, starting at position index
+		
+		>>> bytes(CipherText('ABCDEF').column(1, 2))
+		b'\\x01\\x03\\x05'
+		"""
+		return memoryview(self.ordinals)[index::k]
+	
+	def columns(self, k):
+		""" (integer) -> list
+		
+		Return the k zero-copy column views of this text, for a key of length k
+		"""
+		view = memoryview(self.ordinals)
+		return [view[index::k] for index in range(k)]
+	
+	def letterCounts(self):
+		""" () -> list
+		
+		Return a list of 26 counts, the number of times each letter A..Z occurs in this text
+		
+		>>> CipherText('ABBA Z').letterCounts()[:3]
+		[2, 2, 0]
+		"""
+		return [self.ordinals.count(ordinal) for ordinal in range(26)]
+	
+	def translate(self, table):
+		""" (bytes) -> CipherText
+		
+		Return a new CipherText with every ordinal mapped through the 256 byte table
+		(see makeOrdinalTable), keeping the non-letters of this text
+		
+		>>> CipherText('AB C').translate(SHIFT_TABLES[1]).toText()
+		'BC D'
+		"""
+		return CipherText.fromOrdinals(self.ordinals.translate(table), self.nonLetters)
+	
+	def withOrdinals(self, ordinals):
+		""" (bytes) -> CipherText
+		
+		Return a new CipherText holding ordinals, with the non-letters of this text
+		"""
+		return CipherText.fromOrdinals(bytes(ordinals), self.nonLetters)
+	
+	def toText(self, alphabet=UPPERCASE):
+		""" (str) -> str
+		
+		Decode this text, writing each ordinal as the corresponding letter of alphabet
+		(upper case by default), and restoring the original non-letter characters
+		
+		>>> CipherText('Ab c').toText(LOWERCASE)
+		'ab c'
+		"""
+		table = bytearray(256)
+		table[:26] = alphabet.encode('latin-1')
+		text = self.ordinals.translate(table).decode('latin-1')
+		if not self.nonLetters:
+			return text
+		chars = list(text)
+		for position, char in self.nonLetters.items():
+			chars[position] = char
+		return ''.join(chars)
+	
+	def toLower(self):
+		""" () -> str
+		
+		Decode this text as lower case (clear) letters
+		"""
+		return self.toText(LOWERCASE)
+
+# The directory holding this module, and the data files shipped alongside it
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+ENGLISH_FREQUENCIES_FILE = os.path.join(MODULE_DIR, 'englishletterfreqs.txt')
+# The training corpus for n-gram statistics: English prose shipped in the corpus directory, kept apart
+# from the challenge plaintexts so that the solvers are never scored on text they were trained on.
+# opticks.txt is Isaac Newton's Opticks (4th edition, 1730), from Project Gutenberg (public domain).
+ENGLISH_CORPUS_DIR = os.path.join(MODULE_DIR, 'corpus')
+ENGLISH_CORPUS_FILES = [os.path.join(ENGLISH_CORPUS_DIR, 'opticks.txt')]
+
+def readLetterFrequencies(fileName=ENGLISH_FREQUENCIES_FILE):
+	# Reads a letter frequency file, one letter and its percentage frequency per line
+	""" (str) -> list
+	
+	Return a list of the 26 relative letter frequencies (summing to 1) read from fileName,
+	indexed by ordinal (A = 0 ... Z = 25)
+	
+	>>> round(readLetterFrequencies()[cipherLetterToOrdinal('E')], 3)
+	0.127
+	"""
+	frequencies = [0.0] * 26
+	for line in readFile(fileName).splitlines():
+		fields = line.split()
+		if len(fields) == 2:
+			frequencies[cipherLetterToOrdinal(fields[0])] = float(fields[1])
+	total = sum(frequencies)
+	return [frequency / total for frequency in frequencies]
+
+# Letter frequencies already read by this process, by file name
+_letterFrequencies = {}
+
+def letterFrequencies(fileName=ENGLISH_FREQUENCIES_FILE):
+	""" (str) -> tuple
+
+	Return the 26 relative letter frequencies held in fileName (see readLetterFrequencies),
+	reading the file only the first time they are needed. The tuple is shared, so it cannot be changed.
+
+	>>> letterFrequencies() is letterFrequencies()
+	True
+	"""
+	if fileName not in _letterFrequencies:
+		_letterFrequencies[fileName] = tuple(readLetterFrequencies(fileName))
+	return _letterFrequencies[fileName]
+
+def chiSquaredShiftTable(letterCounts, frequencies):
+	# Scores every Caesar shift of a column of text against the expected letter frequencies
+	""" (list, list) -> list
+	
+	Return a list of 26 chi-squared statistics, one for each shift s, comparing the
+	letterCounts of a column of text, shifted back by s, with the expected frequencies.
+	The lower the statistic, the closer the shifted column is to the expected language.
+	
+	>>> table = chiSquaredShiftTable(CipherText('GHIHQGWKHHDVWZDOORIWKHFDVWOH').letterCounts(), readLetterFrequencies())
+	>>> table.index(min(table))
+	3
+	"""
+	n = sum(letterCounts)
+	if n == 0:
+		return [0.0] * 26
+	expected = [n * frequency for frequency in frequencies]
+	table = []
+	for shift in range(26):
+		chiSquared = 0.0
+		for ordinal in range(26):
+			difference = letterCounts[(ordinal + shift) % 26] - expected[ordinal]
+			chiSquared += difference * difference / expected[ordinal]
+		table.append(chiSquared)
+	return table
+
+class LetterCountIndex:
+	"""
+	A cumulative count index over the letters of a text, from which the letter counts, IoC or
+	chi-squared statistic of any window [start, end) of the text are found with 26 short counts,
+	without copying the window.
+	
+	The running count of every letter is stored at each multiple of blockSize (about 0.4 bytes per
+	letter of text with the default blockSize), and the count at any other position is made up from
+	the nearest checkpoint and a bytes.count over less than half a block.
+	
+	Per-residue indexes, built on demand by column, do the same for the columns of a text
+	taken with a stride of k, such as the columns of a Vigenere ciphertext for a key of length k.
+	
+	>>> index = LetterCountIndex('ABAB CDCD', blockSize=2)
+	>>> index.counts(1, 5)[:4]
+	[1, 2, 1, 0]
+	>>> index.columnCounts(2, 1)[:4]
+	[0, 2, 0, 2]
+	"""
+	
+	def __init__(self, charList, blockSize=256):
+		"""
+		Constructs a new LetterCountIndex over the letters of charList
+		"""
+		self.ordinals = CipherText(charList).letters().ordinals
+		self.blockSize = blockSize
+		blockStarts = range(0, len(self.ordinals), blockSize)
+		# checkpoints[ordinal][block] is the number of times ordinal occurs before block * blockSize
+		self.checkpoints = []
+		for ordinal in range(26):
+			blockCounts = (self.ordinals.count(ordinal, start, start + blockSize) for start in blockStarts)
+			self.checkpoints.append(array.array('I', itertools.accumulate(blockCounts, initial=0)))
+		self._columnIndexes = {}
+	
+	def __len__(self):
+		return len(self.ordinals)
+	
+	def _bounds(self, start, end):
+		# Clip a window to the text, in the manner of a slice
+		length = len(self.ordinals)
+		start, end, _ = slice(start, end).indices(length)
+		return start, max(start, end)
+	
+	def _countBefore(self, ordinal, position):
+		# Return the number of times ordinal occurs before position, counting from the nearest checkpoint
+		block, offset = divmod(position, self.blockSize)
+		checkpoints = self.checkpoints[ordinal]
+		if offset > self.blockSize // 2 and block + 1 < len(checkpoints):
+			blockEnd = (block + 1) * self.blockSize
+			return checkpoints[block + 1] - self.ordinals.count(ordinal, position, blockEnd)
+		return checkpoints[block] + self.ordinals.count(ordinal, block * self.blockSize, position)
+	
+	def counts(self, start=0, end=None):
+		""" (integer, integer) -> list
+		
+		Return a list of 26 counts, the number of times each letter A..Z occurs in the window [start, end)
+		"""
+		start, end = self._bounds(start, end)
+		return [self._countBefore(ordinal, end) - self._countBefore(ordinal, start) for ordinal in range(26)]
+	
+	def ioc(self, start=0, end=None):
+		""" (integer, integer) -> float
+		
+		Return the Index of Coincidence of the window [start, end)
+		"""
+		return iocFromCounts(self.counts(start, end))
+	
+	def chiSquared(self, start=0, end=None, frequencies=None, shift=0):
+		""" (integer, integer, list, integer) -> float
+		
+		Return the chi-squared statistic of the window [start, end), shifted back by shift,
+		against the expected letter frequencies (English, by default)
+		"""
+		if frequencies is None:
+			frequencies = letterFrequencies()
+		return chiSquaredShiftTable(self.counts(start, end), frequencies)[shift]
+	
+	def slidingIoc(self, width, step=None):
+		""" (integer, integer) -> generator
+		
+		Yield a (start, ioc) tuple for every window of width letters, moving step letters at a time
+		(by default, half a window), to show where the cipher of a long text changes
+		"""
+		step = step or max(width // 2, 1)
+		for start in range(0, max(len(self.ordinals) - width, 0) + 1, step):
+			yield start, self.ioc(start, start + width)
+	
+	def column(self, k, residue):
+		""" (integer, integer) -> LetterCountIndex
+		
+		Return the index of the column of letters at the positions congruent to residue modulo k,
+		building it the first time it is needed
+		"""
+		if (k, residue) not in self._columnIndexes:
+			column = CipherText.fromOrdinals(self.ordinals[residue::k])
+			self._columnIndexes[(k, residue)] = LetterCountIndex(column, self.blockSize)
+		return self._columnIndexes[(k, residue)]
+	
+	def columnCounts(self, k, residue, start=0, end=None):
+		""" (integer, integer, integer, integer) -> list
+		
+		Return a list of 26 counts of the letters at the positions in the window [start, end)
+		of the text which are congruent to residue modulo k
+		"""
+		start, end = self._bounds(start, end)
+		# The column positions of the first letters of the column at or after start and end
+		return self.column(k, residue).counts(-((residue - start) // k), -((residue - end) // k))
+	
+	def columnIoc(self, k, residue, start=0, end=None):
+		""" (integer, integer, integer, integer) -> float
+		
+		Return the Index of Coincidence of the column residue, taken with a stride of k, of the window [start, end)
+		"""
+		return iocFromCounts(self.columnCounts(k, residue, start, end))
+
+# Every byte which is not an ASCII letter, deleted when normalising a text file
+NON_LETTER_BYTES = bytes(byte for byte in range(256) if ENCODE_TABLE[byte] == NON_LETTER)
+# The same as ENCODE_TABLE, but merging J into I (for the 5x5 key square of the Bifid cipher)
+ENCODE_J_TO_I_TABLE = ENCODE_TABLE.replace(b'\x09', b'\x08')
+
+def iterCipherTextChunks(fileName, chunkSize=1 << 20, mapJToI=False):
+	""" (str, integer, bool) -> generator
+	
+	Memory-map the file fileName and yield its letters as CipherText chunks of ordinals, normalising
+	each chunk of chunkSize bytes in one pass: whitespace, punctuation and any other non-letters
+	are dropped, case is ignored, and with mapJToI, J is read as I.
+	"""
+	table = ENCODE_J_TO_I_TABLE if mapJToI else ENCODE_TABLE
+	file = open(fileName, 'rb')
+	try:
+		if os.fstat(file.fileno()).st_size == 0:
+			return
+		contents = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		try:
+			for chunkStart in range(0, len(contents), chunkSize):
+				chunk = contents[chunkStart:chunkStart + chunkSize].translate(table, NON_LETTER_BYTES)
+				if chunk:
+					yield CipherText.fromOrdinals(chunk)
+		finally:
+			contents.close()
+	finally:
+		file.close()
+
+def readCipherText(fileName, mapJToI=False):
+	""" (str, bool) -> CipherText
+	
+	Return the letters of the file fileName as one CipherText, normalised as by iterCipherTextChunks.
+	This replaces readFile followed by stripWhitespace and list(), holding only the ordinal buffer
+	rather than three copies of the text.
+	
+	>>> readCipherText('example.txt').toText()[:10]
+	'XSFJDJMNRF'
+	"""
+	ordinals = bytearray()
+	for chunk in iterCipherTextChunks(fileName, mapJToI=mapJToI):
+		ordinals += chunk.ordinals
+	return CipherText.fromOrdinals(bytes(ordinals))
+
+def readEnglishCorpus(fileNames=ENGLISH_CORPUS_FILES):
+	""" (list) -> CipherText
+	
+	Return the letters of the English training corpus held in the files fileNames
+	"""
+	ordinals = b''.join(readCipherText(fileName).ordinals for fileName in fileNames)
+	return CipherText.fromOrdinals(ordinals)
+
+# The format and width in bytes of the machine word used to read each n-gram out of an ordinal buffer in one step
+NGRAM_WORDS = {2: ('H', 2), 3: ('I', 4), 4: ('I', 4)}
+# Inputs of at least this many letters are counted on a pool of processes by countNgrams
+PARALLEL_COUNT_THRESHOLD = 1 << 22
+
+def _countOrdinalNgrams(ordinals, n):
+	# Count every n-gram in the buffer of letter ordinals, indexed by the n-gram read as a base 26 number.
+	# Each n-gram is read as the low bytes of a machine word: the buffer is viewed as an array of
+	# words from each of the word's byte offsets, and collections.Counter tallies the words in C.
+	size = 26 ** n
+	if n == 1:
+		return [ordinals.count(ordinal) for ordinal in range(26)]
+	if len(ordinals) < n:
+		return [0] * size
+	wordFormat, width = NGRAM_WORDS[n]
+	# Pad the end, so the last n-grams fill a whole word; words holding padding in their first n bytes are skipped
+	padded = bytes(ordinals) + bytes([NON_LETTER]) * (width - 1)
+	view = memoryview(padded)
+	words = collections.Counter()
+	for offset in range(width):
+		wordCount = (len(padded) - offset) // width
+		words.update(view[offset:offset + wordCount * width].cast(wordFormat))
+	view.release()
+	counts = [0] * size
+	for word, count in words.items():
+		index = 0
+		for ordinal in word.to_bytes(width, sys.byteorder)[:n]:
+			if ordinal >= 26:
+				break
+			index = index * 26 + ordinal
+		else:
+			counts[index] += count
+	return counts
+
+def _countOrdinalNgramsArgs(args):
+	# Unpacks the arguments of _countOrdinalNgrams, for Pool.map
+	return _countOrdinalNgrams(*args)
+
+def mergeNgramCounts(partialCounts):
+	""" (list) -> list
+	
+	Return the sum of the partial n-gram count lists partialCounts, such as the counts of
+	consecutive pieces of a text
+	
+	>>> mergeNgramCounts([[1, 0, 2], [0, 3, 1]])
+	[1, 3, 3]
+	"""
+	return [sum(counts) for counts in zip(*partialCounts)]
+
+def countNgrams(charList, n, processes=None, chunkSize=PARALLEL_COUNT_THRESHOLD):
+	""" (list, integer, integer, integer) -> list
+	
+	Return a list of the counts of every n-gram (n from 1 to 4) in the letters of charList,
+	indexed by the n-gram's ordinals read as a base 26 number: 26 unigram counts, 26**2 bigram counts,
+	and so on. Texts of more than chunkSize letters are split into overlapping pieces, counted on a
+	pool of processes (processes defaults to the number of CPUs) and merged.
+	
+	>>> countNgrams('ABAB', 2)[1]
+	2
+	>>> countNgrams('ABAB', 1)[:3]
+	[2, 2, 0]
+	"""
+	if n not in (1, 2, 3, 4):
+		raise ValueError('n-grams can only be counted for n from 1 to 4, not %s' % (n))
+	ordinals = CipherText(charList).letters().ordinals
+	if len(ordinals) <= chunkSize or processes == 1:
+		return _countOrdinalNgrams(ordinals, n)
+	# Each piece overlaps the next by n - 1 letters, so every n-gram is counted exactly once
+	tasks = [(ordinals[start:start + chunkSize + n - 1], n) for start in range(0, len(ordinals) - n + 1, chunkSize)]
+	# multiprocessing is imported only when needed, as it is slow to import
+	import multiprocessing
+	pool = multiprocessing.Pool(processes)
+	try:
+		partialCounts = pool.map(_countOrdinalNgramsArgs, tasks)
+	finally:
+		pool.close()
+		pool.join()
+	return mergeNgramCounts(partialCounts)
+
+def ngramToText(index, n):
+	""" (integer, integer) -> str
+	
+	Return the n-gram whose ordinals read as a base 26 number are index
+	
+	>>> ngramToText(1, 2)
+	'AB'
+	"""
+	letters = []
+	for _ in range(n):
+		index, ordinal = divmod(index, 26)
+		letters.append(UPPERCASE[ordinal])
+	return ''.join(reversed(letters))
+
+def topNgrams(counts, n, k=10):
+	""" (list, integer, integer) -> list
+	
+	Return a list of (count, n-gram) tuples for the k most frequent n-grams of the
+	n-gram count list counts (see countNgrams), most frequent first
+	
+	>>> topNgrams(countNgrams('THE CAT THE HAT', 3), 3, 2)
+	[(2, 'THE'), (1, 'ATT')]
+	"""
+	best = heapq.nlargest(k, ((count, -index) for index, count in enumerate(counts) if count))
+	return [(count, ngramToText(-negIndex, n)) for count, negIndex in best]
+
+# Sanity check on the known example cipher, run on demand by self_test
+@self_test.register('logic')
+def _selfTestLogic():
+	self_test.check(integerToChr(7) == 'H', 'integerToChr(cipherInt)')
 
 # if cipher_utils.py is run, instead of being imported as a module,
 # call the main() function
 
 if __name__ == '__main__':
+	if '--self-test' in sys.argv:
+		self_test.main(['cipher_utils'])
 	main()
@@ -1,6 +1,8 @@
 # Cryptomath Module
 # Author: Al Sweigart (Hacking Secret Ciphers with Python)
 # http://inventwithpython.com/hacking (BSD Licensed)
+# Extended by Steve Dwyer with a single pass extended Euclidean algorithm, batch inverses,
+# and cached inverse, multiplication and unit tables for small moduli such as 26
 
 def gcd(a, b):
 	# Return the GCD of a and b using Euclid's algorithm
@@ -9,18 +11,126 @@ def gcd(a, b):
 		a, b = b % a, a
 	return b
 
+def egcd(a, b):
+	""" (int, int) -> tuple
+
+	Return a (g, x, y) tuple, where g is the GCD of a and b and a*x + b*y = g,
+	using the extended Euclidean algorithm in a single pass
+
+	>>> egcd(240, 46)
+	(2, -9, 47)
+	"""
+	x0, x1, y0, y1 = 1, 0, 0, 1
+	while b != 0:
+		q, r = divmod(a, b)
+		a, b = b, r
+		x0, x1 = x1, x0 - q * x1
+		y0, y1 = y1, y0 - q * y1
+	return a, x0, y0
+
+# Moduli up to this size have their tables built and cached the first time they are used
+SMALL_MODULUS_LIMIT = 256
+
+# The inverse tables built so far, by modulus
+_inverseTables = {}
+
+def modInverseTable(m):
+	""" (int) -> list
+
+	Return the list of the modular inverses of 0, 1, ..., m - 1 mod m, with None for the
+	numbers which have no inverse, building it the first time it is needed for m
+
+	>>> modInverseTable(10)
+	[None, 1, None, 7, None, None, None, 3, None, 9]
+	"""
+	if m not in _inverseTables:
+		table = [None] * m
+		for a in range(m):
+			g, x, y = egcd(a, m)
+			if g == 1:
+				table[a] = x % m
+		_inverseTables[m] = table
+	return _inverseTables[m]
+
 def findModInverse(a, m):
 	# Returns the modular inverse of a % m, which is
 	# the number x such that a*x % m = 1
 	# Author: Al Sweigart (Hacking Secret Ciphers with Python)
-	if gcd(a, m) != 1:
+	# Small moduli are looked up in their inverse table, and larger ones calculated with
+	# the extended Euclidean algorithm, whose GCD shows whether there is an inverse at all
+	if m <= SMALL_MODULUS_LIMIT:
+		return modInverseTable(m)[a % m]
+	g, x, y = egcd(a % m, m)
+	if g != 1:
 		return None # no mod inverse if a and m aren't relatively prime
+	return x % m
+
+# The multiplication tables built so far, by modulus
+_multiplicationTables = {}
+
+def modMultiplicationTable(m):
+	""" (int) -> list
+
+	Return the multiplication table mod m (no larger than SMALL_MODULUS_LIMIT), a list of m bytes
+	rows in which table[a][b] is a*b % m, building it the first time it is needed for m
+
+	>>> modMultiplicationTable(26)[7][11]
+	25
+	"""
+	if m not in _multiplicationTables:
+		if m > SMALL_MODULUS_LIMIT:
+			raise ValueError('there is no multiplication table for modulus %s, which is larger than %s' % (m, SMALL_MODULUS_LIMIT))
+		_multiplicationTables[m] = [bytes(a * b % m for b in range(m)) for a in range(m)]
+	return _multiplicationTables[m]
+
+def unitsMod(m):
+	""" (int) -> list
+
+	Return the list of the units mod m, the numbers below m which have an inverse mod m
+
+	>>> unitsMod(26)
+	[1, 3, 5, 7, 9, 11, 15, 17, 19, 21, 23, 25]
+	"""
+	if m <= SMALL_MODULUS_LIMIT:
+		return [a for a, inverse in enumerate(modInverseTable(m)) if inverse is not None]
+	return [a for a in range(m) if gcd(a, m) == 1]
+
+def isUnit(a, m):
+	""" (int, int) -> bool
+
+	Return True if a has an inverse mod m, that is, if a and m are relatively prime
+
+	>>> isUnit(15, 26), isUnit(13, 26)
+	(True, False)
+	"""
+	return findModInverse(a, m) is not None
+
+def batchModInverse(values, m):
+	""" (list, int) -> list
 
-	# Calculate using the extended Euclidean algorithm
-	u1, u2, u3 = 1, 0, a
-	v1, v2, v3 = 0, 1, m
-	while v3 != 0:
-		q = u3 // v3
-		v1, v2, v3, u1, u2, u3 = (u1 - q * v1), (u2 - q * v2), (u3 - q * v3), v1, v2, v3
-	return u1 % m
+	Return the list of the modular inverses mod m of every number in values, with None for those
+	which have no inverse. Montgomery's trick inverts the product of all of the numbers once, then
+	unwinds the inverse of each number from it with multiplications, so n inverses cost one
+	extended Euclidean algorithm and 3 * (n - 1) multiplications.
 
+	>>> batchModInverse([3, 5, 7], 101)
+	[34, 81, 29]
+	>>> batchModInverse([3, 4, 7], 10)
+	[7, None, 3]
+	"""
+	values = [value % m for value in values]
+	# prefixProducts[i] is the product of values[:i]
+	prefixProducts = [1]
+	for value in values:
+		prefixProducts.append(prefixProducts[-1] * value % m)
+	g, productInverse, y = egcd(prefixProducts[-1], m)
+	if g != 1:
+		# Some number has no inverse, so the product has none: invert each number on its own
+		return [findModInverse(value, m) for value in values]
+	inverses = [None] * len(values)
+	productInverse %= m
+	for i in range(len(values) - 1, -1, -1):
+		# productInverse is the inverse of values[0] * ... * values[i]
+		inverses[i] = productInverse * prefixProducts[i] % m
+		productInverse = productInverse * values[i] % m
+	return inverses
@@ -1,145 +1,281 @@
 # hill.py
 # Author: Steve Dwyer
 
-import sys, logger, cipher_utils
-
-def getKeyMatrix(keyString):
-	keyLength = len(keyString)
-	m = n = keyLength // 2
-	logger.debug('Matrix Dimensions = %sx%s' % (m ,n))
-	matrix = []
-	charNr = 0
-	while charNr < keyLength:
-		for i in range(m):
-			row = []
-			for j in range(n):
-				row.append(keyString[charNr])
-				charNr+=1
-			logger.debug('row = %s' % (row))
-			matrix.append(row)
-	logger.debug('key matrix = %s' % (matrix))
-	return matrix
-
-def getMatrixInverse(keyMatrix):
-	# calc inv matrix
-	# Only proven to work on a 2x2 matrix (4 letter keyword) for now
-	# First, find the determinant det K of keyMatrix K
+import sys, math, heapq, itertools, logger, cipher_utils, cryptomath, ngram_score, self_test
+
+def hillCipher(charList, keyString, mode='encrypt'):
+	""" (list, str, str) -> str
+	
+	Encrypt (or, with mode='decrypt', decrypt) the letters of charList with the Hill cipher, using
+	the key keyString (a str of n*n letters, or a HillKey). charList may be a str, a list of
+	characters or a cipher_utils.CipherText. A final incomplete block is padded with X.
+	
+	>>> hillCipher(['A', 'B', 'C', 'D'], 'HILL')
+	'ILMD'
+	"""
+	key = getHillKey(keyString)
+	ordinals = cipher_utils.CipherText(charList).letters().ordinals
+	logger.debug('%sing %s letters', mode, len(ordinals))
+	if mode == 'encrypt':
+		ordinals = key.encrypt(ordinals)
+	else:
+		ordinals = key.decrypt(ordinals)
+	return cipher_utils.CipherText.fromOrdinals(ordinals).toText()
+
+def hillCipherStream(chunks, keyString, mode='encrypt'):
+	""" (iterable, str, str) -> generator
+	
+	Encrypt (or, with mode='decrypt', decrypt) a long text arriving as an iterable of chunks
+	(each a str or cipher_utils.CipherText), yielding the result chunk by chunk as upper case str.
+	Letters which do not fill a whole block are carried over to the next chunk, and the
+	final incomplete block is padded with X, so the output matches hillCipher on the whole text.
+	"""
+	key = getHillKey(keyString)
+	operation = key.encrypt if mode == 'encrypt' else key.decrypt
+	carried = b''
+	for chunk in chunks:
+		ordinals = carried + cipher_utils.CipherText(chunk).letters().ordinals
+		blockLength = len(ordinals) - len(ordinals) % key.n
+		carried = ordinals[blockLength:]
+		if blockLength:
+			yield cipher_utils.CipherText.fromOrdinals(operation(ordinals[:blockLength])).toText()
+	if carried:
+		yield cipher_utils.CipherText.fromOrdinals(operation(carried)).toText()
+
+def matrixDeterminant(matrix, modulus=26):
+	""" (list, integer) -> integer
+	
+	Return the determinant of the square matrix of integers matrix, mod modulus,
+	by cofactor expansion along the first row
+	
+	>>> matrixDeterminant([[7, 8], [11, 11]])
+	15
+	"""
+	if len(matrix) == 1:
+		return matrix[0][0] % modulus
 	det = 0
-	m = n = p = len(keyMatrix)
-	for i in range (m // 2):
-		for j in range (n):
-			subDet = cipher_utils.cipherLetterToOrdinal(keyMatrix[i][j]) * cipher_utils.cipherLetterToOrdinal(keyMatrix[m-1][n-1])
-			if i == j:
-				det += subDet
-			else:
-				det -= subDet
-			logger.debug('determinant=%s, i=%s, j=%s, m=%s, n=%s, keyL=%s, keyR=%s' % (det, i, j, m, n, cipher_utils.cipherLetterToOrdinal(keyMatrix[i][j]), cipher_utils.cipherLetterToOrdinal(keyMatrix[m-1][n-1])))
-			n-=1
-		n=p
-		m-=1
-	det = det % 26
-	logger.debug('determinant = %s' % (det))
-
-	# Next, find the multiplicative inverse of the determinant det K
-	di=0;
-	for x in range(26):
-		if (det * x) % 26 == 1:
-			di = x
-	if di == 0:
-		print('could not invert, try different key')
+	for j in range(len(matrix)):
+		minor = [row[:j] + row[j + 1:] for row in matrix[1:]]
+		sign = -1 if j % 2 else 1
+		det += sign * matrix[0][j] * matrixDeterminant(minor, modulus)
+	return det % modulus
+
+def matrixInverse(matrix, modulus=26):
+	""" (list, integer) -> list
+	
+	Return the inverse of the square matrix of integers matrix, mod modulus, as the adjugate
+	matrix multiplied by the inverse of the determinant, or None if it is not invertible
+	
+	>>> matrixInverse([[7, 8], [11, 11]])
+	[[25, 22], [1, 23]]
+	"""
+	n = len(matrix)
+	detInverse = cryptomath.findModInverse(matrixDeterminant(matrix, modulus), modulus)
+	if detInverse is None:
 		return None
-	logger.debug('multiplicative inverse K**-1 of the determinant det K (such that (det * x) mod 26 = 1 : %s' % (di))
-	keyInverseMatrix = []
-	m = n = p = len(keyMatrix)
-	for i in range (p):
-		row = []
-		for j in range (p):
-			if i == j:
-				inverse = di * cipher_utils.cipherLetterToOrdinal(keyMatrix[m-1][n-1])
-				logger.debug('m=%s, n=%s row[%s][%s] = %s (mod 26)' % (m-1, n-1, i, j, inverse))
-			else:
-				inverse = -1 * di * cipher_utils.cipherLetterToOrdinal(keyMatrix[i][j])
-				logger.debug('i=%s, j=%s row[%s][%s] = %s (mod 26)' % (i, j, i, j, inverse))
-			inverse = inverse % 26
-			row.append(inverse)
-			logger.debug('row[%s][%s] = %s' % (i, j, inverse))
-			n-=1
-		keyInverseMatrix.append(row)
-		n=p
-		m-=1
-	logger.debug('keyInverseMatrix = %s' % (keyInverseMatrix))
-	return keyInverseMatrix
-
-def matrixInverseMult(keyMatrix, colVector):
-	m = n = len(keyMatrix)
-	keyInverseMatrix = getMatrixInverse(keyMatrix)
-	letterBlock = []
-	for i in range(n):
-		productElement = 0
-		for j in range(m):
-			inverseKeyOrd = keyInverseMatrix[i][j]
-			letter = colVector[j]
-			letterOrd = cipher_utils.cipherLetterToOrdinal(letter)
-			productElement += inverseKeyOrd * letterOrd
-		cipherOrd = (productElement) % 26
-		cipherLetter = cipher_utils.integerToChr(cipherOrd)
-		logger.debug('%s x  %s (%s) = %s (%s)' % (inverseKeyOrd, letter, letterOrd, cipherOrd, cipherLetter))
-		letterBlock.append(cipherLetter)
-	return ''.join(letterBlock)
-
-def matrixMult(keyMatrix, colVector):
-	m = n = len(keyMatrix)
-	letterBlock = []
+	if n == 1:
+		return [[detInverse]]
+	inverse = []
 	for i in range(n):
-		productElement = 0
-		for j in range(m):
-			keyLetter = keyMatrix[i][j]
-			keyOrd = cipher_utils.cipherLetterToOrdinal(keyLetter)
-			letter = colVector[j]
-			letterOrd = cipher_utils.cipherLetterToOrdinal(letter)
-			productElement += keyOrd * letterOrd
-		cipherOrd = (productElement) % 26
-		cipherLetter = cipher_utils.integerToChr(cipherOrd)
-		logger.debug('%s (%s) x  %s (%s) = %s (%s)' % (keyLetter, keyOrd, letter, letterOrd, cipherOrd, cipherLetter))
-		letterBlock.append(cipherLetter)
-	return ''.join(letterBlock)
+		row = []
+		for j in range(n):
+			# The adjugate is the transpose of the cofactor matrix
+			minor = [matrixRow[:i] + matrixRow[i + 1:] for rowNr, matrixRow in enumerate(matrix) if rowNr != j]
+			sign = -1 if (i + j) % 2 else 1
+			row.append(sign * detInverse * matrixDeterminant(minor, modulus) % modulus)
+		inverse.append(row)
+	return inverse
 
-def hillCipher(charList, keyString, mode='encrypt'):
-	logger.debug('%sing %s' % (mode, charList))
-	keyMatrix = getKeyMatrix(keyString)
-	textLength = len(charList)
-	keyLength = len(keyString)
-	n = keyLength // 2
-	cipherlist = []
-	charNr = 0
-	while charNr < textLength:
-		colVector = []
-		logger.debug('charNr=%s' % (charNr))
-		logger.debug('charNr=%s, charList[charNr]=%s' % (charNr, charList[charNr]))
+# Ordinal used to pad the final block of a text which is not a whole number of blocks
+PAD_ORDINAL = cipher_utils.cipherLetterToOrdinal('X')
+
+class HillKey:
+	"""
+	A Hill cipher key, parsed into a matrix of ordinals once, with its inverse (mod 26)
+	calculated the first time it is needed and then cached
+	"""
+	
+	def __init__(self, keyString):
+		"""
+		Constructs a new HillKey from keyString, a str of n*n letters read row by row
+		"""
+		ordinals = cipher_utils.CipherText(keyString).letters().ordinals
+		self.n = math.isqrt(len(ordinals))
+		if self.n == 0 or self.n * self.n != len(ordinals):
+			raise ValueError('A Hill key must have a square number of letters, not %s' % (len(ordinals)))
+		self.keyString = cipher_utils.CipherText.fromOrdinals(ordinals).toText()
+		self.matrix = [list(ordinals[i * self.n:(i + 1) * self.n]) for i in range(self.n)]
+		self._inverse = None
+	
+	@property
+	def inverse(self):
+		"""
+		The inverse key matrix (mod 26), raising ValueError if the key is not invertible
+		"""
+		if self._inverse is None:
+			self._inverse = matrixInverse(self.matrix)
+			if self._inverse is None:
+				raise ValueError('The Hill key %s is not invertible mod 26' % (self.keyString))
+			logger.debug('keyInverseMatrix = %s', self._inverse)
+		return self._inverse
+	
+	def multiply(self, matrix, ordinals):
+		""" (list, bytes) -> bytes
+		
+		Return the product (mod 26) of matrix with the whole text of ordinals, arranged as an
+		n x blocks matrix whose column k is block k of the text. Row j of the text matrix is the
+		strided column ordinals[j::n], so each output row is a sum of whole-text translations.
+		"""
+		n = self.n
+		if len(ordinals) % n:
+			ordinals = bytes(ordinals) + bytes([PAD_ORDINAL]) * (n - len(ordinals) % n)
+		textRows = [bytes(ordinals[j::n]) for j in range(n)]
+		output = bytearray(len(ordinals))
 		for i in range(n):
-			logger.debug('i=%s, n=%s' % (i, n))
-			colVector.append(charList[charNr])
-			charNr+=1
-		if mode == 'encrypt':
-			letterBlock = matrixMult(keyMatrix, colVector)
-		else:
-			letterBlock = matrixInverseMult(keyMatrix, colVector)
-		logger.debug('letter block = %s' % (letterBlock))
-		cipherlist.append(letterBlock)
-	logger.debug('cipherlist = %s' % (cipherlist))
-	ciphertext = ''.join(cipherlist)
-	logger.debug('ciphertext = %s' % (ciphertext))
-	return ciphertext
+			rowSum = textRows[0].translate(cipher_utils.MULTIPLY_TABLES[matrix[i][0]])
+			for j in range(1, n):
+				rowSum = cipher_utils.addOrdinals(rowSum, textRows[j].translate(cipher_utils.MULTIPLY_TABLES[matrix[i][j]]))
+				if j % 9 == 0:
+					# Reduce before the sum of products could overflow a byte
+					rowSum = rowSum.translate(cipher_utils.MOD26_TABLE)
+			output[i::n] = rowSum.translate(cipher_utils.MOD26_TABLE)
+		return bytes(output)
+	
+	def encrypt(self, ordinals):
+		""" (bytes) -> bytes
+		
+		Return the ordinals encrypted with this key
+		"""
+		return self.multiply(self.matrix, ordinals)
+	
+	def decrypt(self, ordinals):
+		""" (bytes) -> bytes
+		
+		Return the ordinals decrypted with the cached inverse of this key
+		"""
+		return self.multiply(self.inverse, ordinals)
+
+# Keys already parsed, by key string
+_hillKeys = {}
+
+def getHillKey(keyString):
+	""" (str) -> HillKey
+	
+	Return the HillKey for keyString, parsing and caching it the first time it is used
+	"""
+	if isinstance(keyString, HillKey):
+		return keyString
+	if keyString not in _hillKeys:
+		_hillKeys[keyString] = HillKey(keyString)
+	return _hillKeys[keyString]
+
+# The fitness weight table, built the first time Hill rows are searched
+_fitnessWeightTable = []
+
+def getFitnessWeightTable():
+	""" () -> bytes
+	
+	Return the translation table giving each letter's English log frequency as a small positive
+	integer weight, for a quick unigram fitness. It reduces a sum of two ordinals mod 26 and looks
+	up its weight in one translation. The letter frequencies are read the first time it is needed.
+	
+	>>> getFitnessWeightTable()[4] > getFitnessWeightTable()[25]
+	True
+	"""
+	if not _fitnessWeightTable:
+		englishFrequencies = cipher_utils.letterFrequencies()
+		lowestLogFrequency = math.log10(min(englishFrequencies))
+		letterWeights = [round(20 * (math.log10(frequency) - lowestLogFrequency)) for frequency in englishFrequencies]
+		_fitnessWeightTable.append(cipher_utils.makeOrdinalTable(dict((total, letterWeights[total % 26]) for total in range(52))))
+	return _fitnessWeightTable[0]
+
+def _partialRowSums(blockColumns, coefficientCount):
+	# Returns a dictionary of every combination of coefficientCount coefficients,
+	# and the unreduced sum of the products of those coefficients with blockColumns
+	sums = {(): bytes(len(blockColumns[0]))}
+	for column in blockColumns[:coefficientCount]:
+		nextSums = {}
+		for coefficients, partialSum in sums.items():
+			for coefficient in range(26):
+				productSum = cipher_utils.addOrdinals(partialSum, column.translate(cipher_utils.MULTIPLY_TABLES[coefficient]))
+				nextSums[coefficients + (coefficient,)] = productSum.translate(cipher_utils.MOD26_TABLE)
+		sums = nextSums
+	return sums
+
+def searchHillRows(charList, n, topRows=8):
+	""" (list, integer, integer) -> list
+	
+	Score every one of the 26**n candidate rows of the decryption (inverse key) matrix of the
+	n x n Hill ciphertext charList. Each row alone produces one plaintext letter of every block,
+	so each candidate row is scored independently by the English letter frequency fitness of
+	the letters it produces. The products of the first and last halves of the row with the
+	ciphertext block columns are precomputed, so every candidate costs one addition and one
+	translation of a whole column. Rows which cannot belong to an invertible matrix (sharing a
+	factor with 26) are skipped.
+	Return the topRows best rows as (fitness, row, plaintext ordinals) tuples, best first.
+	"""
+	ordinals = cipher_utils.CipherText(charList).letters().ordinals
+	ordinals = ordinals[:len(ordinals) - len(ordinals) % n]
+	blockColumns = [ordinals[i::n] for i in range(n)]
+	firstHalf = n // 2
+	firstSums = _partialRowSums(blockColumns, firstHalf)
+	lastSums = _partialRowSums(blockColumns[firstHalf:], n - firstHalf)
+	fitnessWeightTable = getFitnessWeightTable()
+	best = []
+	for firstCoefficients, firstSum in firstSums.items():
+		for lastCoefficients, lastSum in lastSums.items():
+			rowOutput = cipher_utils.addOrdinals(firstSum, lastSum)
+			fitness = sum(rowOutput.translate(fitnessWeightTable))
+			if len(best) < topRows or fitness > best[0][0]:
+				row = firstCoefficients + lastCoefficients
+				if not cryptomath.isUnit(math.gcd(*row), 26):
+					continue
+				entry = (fitness, row, rowOutput.translate(cipher_utils.MOD26_TABLE))
+				if len(best) < topRows:
+					heapq.heappush(best, entry)
+				else:
+					heapq.heapreplace(best, entry)
+	return sorted(best, reverse=True)
+
+def crackHill(charList, n, topRows=8):
+	""" (list, integer, integer) -> tuple
+	
+	Recover the n x n decryption matrix of the Hill ciphertext charList without the key.
+	The best rows from searchHillRows are combined, in every order, into invertible matrices,
+	and each combination is scored with the English trigram table. This takes 26**n row
+	evaluations and topRows!/(topRows-n)! combinations, instead of 26**(n*n) whole keys.
+	Return a (score, keyString, plaintext) tuple for the best combination, where keyString is
+	the encryption key, the inverse of the decryption matrix found.
+	"""
+	rows = searchHillRows(charList, n, topRows)
+	scorer = ngram_score.englishNgramTable(3)
+	blockCount = len(rows[0][2])
+	best = None
+	for combination in itertools.permutations(rows, n):
+		matrix = [list(row) for fitness, row, rowOutput in combination]
+		if not cryptomath.isUnit(matrixDeterminant(matrix), 26):
+			continue
+		plainOrdinals = bytearray(blockCount * n)
+		for position, (fitness, row, rowOutput) in enumerate(combination):
+			plainOrdinals[position::n] = rowOutput
+		score = scorer.score(plainOrdinals)
+		if best is None or score > best[0]:
+			best = (score, matrix, plainOrdinals)
+	if best is None:
+		return None
+	score, matrix, plainOrdinals = best
+	keyString = ''.join(cipher_utils.integerToChr(ordinal) for row in matrixInverse(matrix) for ordinal in row)
+	logger.info('decryption matrix %s, key %s, score %s', matrix, keyString, score)
+	return (score, keyString, cipher_utils.CipherText.fromOrdinals(bytes(plainOrdinals)).toLower())
 
 def main():
 	import cipher_utils
 	print('Ensure that plaintext.txt is present in the same directory as hill.py')
 	input('Hit any key to continue...')
-	print('Reading in file plaintext.txt and removing all whitespace characters...')
-	plaintext = cipher_utils.stripWhitespace(cipher_utils.readFile('plaintext.txt'))
+	print('Reading in the letters of file plaintext.txt...')
+	plaintext = cipher_utils.readCipherText('plaintext.txt')
 	logger.setLevel(logger.ERROR)
-	logger.debug('%s' % (plaintext))
-	plaintextlist = list(plaintext)
+	plaintextlist = plaintext
 	print(plaintext)
 	print('Ready to encrypt')
 	input('Hit any key to continue...')
@@ -150,11 +286,10 @@ def main():
 	logger.setLevel(logger.ERROR)
 	print('Ensure that cipher.txt is present in the same directory as hill.py')
 	input('Hit any key to continue...')
-	print('Reading in file cipher.txt and removing all whitespace characters...')
-	ciphertext = cipher_utils.stripWhitespace(cipher_utils.readFile('cipher.txt'))
+	print('Reading in the letters of file cipher.txt...')
+	ciphertext = cipher_utils.readCipherText('cipher.txt')
 	logger.setLevel(logger.ERROR)
-	logger.debug('%s' % (ciphertext))
-	cipherlist = list(ciphertext)
+	cipherlist = ciphertext
 	print(ciphertext)
 	print('Ready to decrypt')
 	input('Hit any key to continue...')
@@ -164,25 +299,19 @@ def main():
 	cipher_utils.writeFile('solution.txt', plaintext)
 	logger.setLevel(logger.ERROR)
 
-# Always perform a sanity check first on the known example cipher:
-print('Checking encryption logic on hill module...')
-logger.setLevel(logger.ERROR)
-if hillCipher(['A', 'B', 'C', 'D'], 'HILL') != 'ILMD':
-	print('Error testing hillCipher(charList, keyString) method!!! Check your code before continuing...')
-	sys.exit()
-else:
-	print('encryption logic OK.')
-print('Checking decryption logic on hill module...')
-logger.setLevel(logger.ERROR)
-if hillCipher(['I', 'L', 'M', 'D'], 'HILL', mode='decrypt') != 'ABCD':
-	print('Error testing hillCipher(charList, keyString, mode=\'decrypt\') method!!! Check your code before continuing...')
-	sys.exit()
-else:
-	print('decryption logic OK.')
-logger.setLevel(logger.ERROR)
+# Sanity checks on the known example cipher, run on demand by self_test
+@self_test.register('encryption logic')
+def _selfTestEncryption():
+	self_test.check(hillCipher(['A', 'B', 'C', 'D'], 'HILL') == 'ILMD', 'hillCipher(charList, keyString)')
+
+@self_test.register('decryption logic')
+def _selfTestDecryption():
+	self_test.check(hillCipher(['I', 'L', 'M', 'D'], 'HILL', mode='decrypt') == 'ABCD', 'hillCipher(charList, keyString, mode=\'decrypt\')')
 
 # if hill.py is run, instead of being imported as a module,
 # call the main() function
 
 if __name__ == '__main__':
+	if '--self-test' in sys.argv:
+		self_test.main(['hill'])
 	main()
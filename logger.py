@@ -41,28 +41,45 @@ class Logger:
 		"""
 		self.level = level
 	
-	def debug(self, msg):
+	def isEnabledFor(self, level):
+		"""
+		Returns True if messages at the logging level level would be printed, so that
+		hot loops can skip building the arguments of a message altogether
+		"""
+		return self.level <= level
+	
+	def log(self, level, msg, *args):
+		"""
+		Prints msg at the logging level level. If args are given, msg is a format string
+		which is only rendered with them once the level check has passed
+		"""
+		if self.level <= level:
+			if args:
+				msg = msg % args
+			print('%s - %s - %s' % (time.asctime(), _levelNames.get(level), msg))
+	
+	def debug(self, msg, *args):
 		if self.level <= DEBUG:
-			print('%s - %s - %s' % (time.asctime(), _levelNames.get(DEBUG), msg))
+			self.log(DEBUG, msg, *args)
 	
-	def info(self, msg):
+	def info(self, msg, *args):
 		if self.level <= INFO:
-			print('%s - %s - %s' % (time.asctime(), _levelNames.get(INFO), msg))
+			self.log(INFO, msg, *args)
 	
-	def warn(self, msg):
+	def warn(self, msg, *args):
 		if self.level <= WARN:
-			print('%s - %s - %s' % (time.asctime(), _levelNames.get(WARN), msg))
+			self.log(WARN, msg, *args)
 	
-	def error(self, msg):
+	def error(self, msg, *args):
 		if self.level <= ERROR:
-			print('%s - %s - %s' % (time.asctime(), _levelNames.get(ERROR), msg))
+			self.log(ERROR, msg, *args)
 
 def getLogger():
 	"""
 	Factory method for creating a new instance of Logger, and initialising
-	its logging level to ALL (0)
+	its logging level to ERROR (4), so that importing the cipher modules is quiet
 	"""
-	return Logger(ALL)
+	return Logger(ERROR)
 
 def setLevel(level):
 	"""
@@ -70,16 +87,22 @@ def setLevel(level):
 	"""
 	logger.setLevel(level)
 
-def debug(msg):
-	logger.debug(msg)
+def isEnabledFor(level):
+	"""
+	Returns True if messages at the logging level level would be printed
+	"""
+	return logger.level <= level
+
+def debug(msg, *args):
+	logger.debug(msg, *args)
 
-def info(msg):
-	logger.info(msg)
+def info(msg, *args):
+	logger.info(msg, *args)
 
-def warn(msg):
-	logger.warn(msg)
+def warn(msg, *args):
+	logger.warn(msg, *args)
 
-def error(msg):
-	logger.error(msg)
+def error(msg, *args):
+	logger.error(msg, *args)
 
 logger = getLogger()
@@ -2,56 +2,91 @@
 # Author: Al Sweigart (Hacking Secret Ciphers with Python)
 # http://inventwithpython.com/hacking (BSD Licensed)
 
-import random, sys, os, rabin_miller, cryptomath
+import secrets, sys, os, rabin_miller, cryptomath
+
+# The standard small public exponent, with which public key operations take 17 multiplications
+PUBLIC_EXPONENT = 65537
 
 def main():
-	# Create a public/private keypair for Bob & Alice with 1024 bit keys
+	# Create a public/private keypair for Bob & Alice with 1024 bit keys:
+	# python make_rsa_keys.py [--small-exponent]
+	# With --small-exponent the public exponent is PUBLIC_EXPONENT, rather than a random keySize bit number
+	publicExponent = PUBLIC_EXPONENT if '--small-exponent' in sys.argv else None
 	print('Making key files...')
-	makeKeyFiles('bob', 1024)
-	makeKeyFiles('alice', 1024)
+	makeKeyFiles('bob', 1024, publicExponent)
+	makeKeyFiles('alice', 1024, publicExponent)
 	print('Key files made.')
 
-def generateKey(keySize):
+def generateKey(keySize, processes=None, publicExponent=None):
 	# Generates a public/private keypair with keys that are keySize bits in size.
 	# This function may take a while to run.
+	# If publicExponent is given (such as PUBLIC_EXPONENT), it is used as e, and p and q are
+	# regenerated until it is relatively prime to (p-1)*(q-1); otherwise e is a random keySize bit number.
 	
-	# Step 1: Create two prime numbers, p and q. Calculate n = p * q.
-	print('Generating p prime...')
-	p = rabin_miller.generateLargePrime(keySize)
-	print('Generating q prime...')
-	q = rabin_miller.generateLargePrime(keySize)
+	# Step 1: Create two prime numbers, p and q, concurrently on a pool of processes
+	# (processes defaults to the number of CPUs). Calculate n = p * q.
+	print('Generating p and q primes...')
+	if publicExponent is None:
+		p, q = rabin_miller.generateLargePrimes(keySize, 2, processes)
+	else:
+		p, q = generatePrimesForExponent(keySize, publicExponent, processes)
 	n = p * q
 	
 	# Step 2: Create a number e that is relatively prime to (p-1)*(q-1).
 	print('Generate e that is relatively prime to (p-1)*(q-1)...')
 	phiPq = (p - 1) * (q - 1)
-	while True:
-		# Keep trying random numbers for e until one is valid
-		e = random.randrange(2**(keySize-1), 2**keySize)
-		if cryptomath.gcd(e, phiPq) == 1:
-			break
+	if publicExponent is not None:
+		e = publicExponent
+	else:
+		while True:
+			# Keep trying random numbers for e until one is valid
+			e = secrets.randbits(keySize - 1) | (1 << (keySize - 1))
+			if cryptomath.gcd(e, phiPq) == 1:
+				break
 	
 	# Step 3: Calculate d, the mod inverse of e.
 	print('Calculating d that is the mod inverse of e...')
 	d = cryptomath.findModInverse(e, phiPq)
 	
+	# Step 4: Keep the CRT parameters of d, so the private key can be used modulo p and q.
+	print('Calculating the CRT parameters of d...')
 	publicKey = (n, e)
-	privateKey = (n, d)
+	privateKey = (n, d) + getCrtParameters(p, q, d)
 	
 	print('Public Key:', publicKey)
 	print('Private Key:', privateKey)
 	
 	return (publicKey, privateKey)
 	
-def makeKeyFiles(name, keySize):
+def generatePrimesForExponent(keySize, publicExponent, processes=None):
+	# Returns two distinct primes p and q of keySize bits for which publicExponent is relatively
+	# prime to p-1 and to q-1, and so to (p-1)*(q-1), regenerating any prime which fails
+	primes = []
+	while len(primes) < 2:
+		for prime in rabin_miller.generateLargePrimes(keySize, 2 - len(primes), processes):
+			if cryptomath.gcd(publicExponent, prime - 1) == 1 and prime not in primes:
+				primes.append(prime)
+	return primes
+
+def getCrtParameters(p, q, d):
+	# Returns the (p, q, dP, dQ, qInv) Chinese Remainder Theorem parameters of the private exponent d,
+	# with which rsa_cipher.crtPow performs private key operations modulo p and q separately
+	dP = d % (p - 1)
+	dQ = d % (q - 1)
+	qInv = cryptomath.findModInverse(q, p)
+	return (p, q, dP, dQ, qInv)
+	
+def makeKeyFiles(name, keySize, publicExponent=None):
 	# Creates two files, '<name>_pubkey.txt' and '<name>_privkey.txt' with the n,e and n,d integers
-	# written in them, delimited by a comma.
+	# written in them, delimited by a comma. The private key file also holds the CRT parameters
+	# p,q,dP,dQ,qInv after n,d, followed by the public exponent e.
+	# publicExponent is passed to generateKey (None for a random e).
 	
 	# Our safety check will prevent us from overwriting our old key files:
 	if os.path.exists('%s_pubkey.txt' % (name)) or os.path.exists('%s_privkey.txt' % (name)):
 		sys.exit('WARNING: The file %s_pubkey.txt or %s_privkey.txt already exists! Use a different name or delete these files and re-run this program.' % (name, name))
 	
-	publicKey, privateKey = generateKey(keySize)
+	publicKey, privateKey = generateKey(keySize, publicExponent=publicExponent)
 	
 	print()
 	print('The public key is a %s and %s digit number.' % (len(str(publicKey[0])), len(str(publicKey[1]))))
@@ -64,7 +99,7 @@ def makeKeyFiles(name, keySize):
 	print('The private key is a %s and %s digit number.' % (len(str(privateKey[0])), len(str(privateKey[1]))))
 	print('Writing private key to file %s_privkey.txt...' % (name))
 	fo = open('%s_privkey.txt' % (name), 'w')
-	fo.write('%s,%s,%s' % (keySize, privateKey[0], privateKey[1]))
+	fo.write(','.join(str(value) for value in (keySize,) + privateKey + (publicKey[1],)))
 	fo.close()
 
 # If make_rsa_keys.py is run (instead of being imported as a module) call the main() function
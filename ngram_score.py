@@ -0,0 +1,180 @@
+# ngram_score.py
+# Author: Steve Dwyer
+# Scores candidate plaintexts by their n-gram log probabilities.
+# The tables are held in a binary file: a 16 byte header, followed by the 26**n log probabilities
+# as a dense array of float32, indexed by the n-gram's ordinals read as a base 26 number.
+# Loading a table memory-maps the file, so every process scoring with the same table shares
+# the same pages, and loading takes no time however large the table is.
+
+import sys, os, math, mmap, struct, array, tempfile, logger, cipher_utils
+
+# Header: magic, format version, n, byte order flag (1 = little endian)
+HEADER_FORMAT = '<4sIII'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+MAGIC = b'NGRM'
+VERSION = 1
+
+# The tables built from the English training corpus are cached alongside this module
+ENGLISH_TABLE_FILE = os.path.join(cipher_utils.MODULE_DIR, 'english%sgrams.bin')
+
+def ngramCounts(charList, n):
+	""" (list, integer) -> list
+	
+	Return a flat list of the counts of every n-gram in charList, indexed by the
+	n-gram's ordinals read as a base 26 number
+	
+	>>> ngramCounts('ABAB', 2)[1]
+	2
+	"""
+	return cipher_utils.countNgrams(charList, n)
+
+def makeNgramTable(charList, n):
+	""" (list, integer) -> array
+	
+	Return an array of float32 base 10 log probabilities of every n-gram in the training text
+	charList. N-grams which never occur are given the log probability of a hundredth of an occurrence.
+	"""
+	counts = ngramCounts(charList, n)
+	total = max(sum(counts), 1)
+	return array.array('f', [math.log10((count or 0.01) / total) for count in counts])
+
+def writeNgramTable(fileName, table, n):
+	""" (str, array, integer) -> None
+	
+	Write the float32 array table of n-gram log probabilities to the binary file fileName
+	"""
+	if len(table) != 26 ** n:
+		raise ValueError('an %s-gram table must have %s entries, not %s' % (n, 26 ** n, len(table)))
+	# The table is written to a temporary file in the same directory, then renamed over fileName
+	# in one step, so a process loading the table in the meantime never maps a half-written file
+	descriptor, temporaryFileName = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(fileName)), suffix='.tmp')
+	try:
+		file = os.fdopen(descriptor, 'wb')
+		try:
+			file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, n, 1 if sys.byteorder == 'little' else 0))
+			table.tofile(file)
+		finally:
+			file.close()
+		os.chmod(temporaryFileName, 0o644)
+		os.replace(temporaryFileName, fileName)
+	except BaseException:
+		os.remove(temporaryFileName)
+		raise
+
+class NgramTable:
+	"""
+	A table of n-gram log probabilities, memory-mapped from a file written by writeNgramTable,
+	which scores buffers of ordinals by their total log probability
+	"""
+	
+	def __init__(self, fileName):
+		"""
+		Constructs a new NgramTable by memory-mapping the file fileName
+		"""
+		file = open(fileName, 'rb')
+		try:
+			self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		finally:
+			file.close()
+		magic, version, self.n, littleEndian = struct.unpack_from(HEADER_FORMAT, self._mmap)
+		if magic != MAGIC or version != VERSION:
+			raise ValueError('%s is not an n-gram table file' % (fileName))
+		self.size = 26 ** self.n
+		if len(self._mmap) != HEADER_SIZE + self.size * 4:
+			raise ValueError('%s is truncated' % (fileName))
+		if bool(littleEndian) == (sys.byteorder == 'little'):
+			self.logProbabilities = memoryview(self._mmap)[HEADER_SIZE:].cast('f')
+		else:
+			# Written on a machine of the other byte order: fall back to a private, swapped copy
+			self.logProbabilities = array.array('f', self._mmap[HEADER_SIZE:])
+			self.logProbabilities.byteswap()
+	
+	def score(self, ordinals):
+		""" (bytes) -> float
+		
+		Return the total log probability of every n-gram in ordinals, a buffer of letter
+		ordinals (without any cipher_utils.NON_LETTER), such as a row returned by
+		vigenere.decryptVigenereBatch. The index of each n-gram is rolled on from the last,
+		so no n-gram is ever sliced out of the text.
+		"""
+		logProbabilities = self.logProbabilities
+		size = self.size
+		warmUp = self.n - 1
+		index = 0
+		for ordinal in ordinals[:warmUp]:
+			index = index * 26 + ordinal
+		score = 0.0
+		for ordinal in ordinals[warmUp:]:
+			index = (index * 26 + ordinal) % size
+			score += logProbabilities[index]
+		return score
+	
+	def scoreBatch(self, rows):
+		""" (list) -> list
+		
+		Return the score of every buffer of ordinals in rows
+		"""
+		return [self.score(row) for row in rows]
+	
+	def scoreText(self, charList):
+		""" (list) -> float
+		
+		Return the score of the letters of charList, a str, list of characters or cipher_utils.CipherText
+		"""
+		return self.score(cipher_utils.CipherText(charList).letters().ordinals)
+	
+	def close(self):
+		"""
+		Releases the memory map
+		"""
+		if isinstance(self.logProbabilities, memoryview):
+			self.logProbabilities.release()
+		self._mmap.close()
+
+# Tables already loaded by this process, by file name
+_loadedTables = {}
+
+def loadNgramTable(fileName):
+	""" (str) -> NgramTable
+	
+	Return the NgramTable held in fileName, memory-mapping it the first time it is loaded
+	"""
+	if fileName not in _loadedTables:
+		_loadedTables[fileName] = NgramTable(fileName)
+	return _loadedTables[fileName]
+
+def englishNgramTable(n):
+	""" (integer) -> NgramTable
+	
+	Return the table of English n-gram log probabilities, building it from the
+	training corpus (see cipher_utils.ENGLISH_CORPUS_FILES) the first time it is needed,
+	and rebuilding it whenever a corpus file is newer than the table
+	
+	>>> englishNgramTable(4).scoreText('THEMAN') > englishNgramTable(4).scoreText('QXZJVK')
+	True
+	"""
+	fileName = ENGLISH_TABLE_FILE % (n)
+	if fileName in _loadedTables:
+		return _loadedTables[fileName]
+	if not os.path.exists(fileName) or os.path.getmtime(fileName) < max(os.path.getmtime(corpusFileName) for corpusFileName in cipher_utils.ENGLISH_CORPUS_FILES):
+		logger.info('Building %s from the English training corpus...', fileName)
+		writeNgramTable(fileName, makeNgramTable(cipher_utils.readEnglishCorpus(), n), n)
+	return loadNgramTable(fileName)
+
+def main():
+	# Builds the English bigram, trigram and quadgram tables, or a table from a given corpus:
+	# python ngram_score.py [corpus.txt n table.bin]
+	if len(sys.argv) == 4:
+		corpusFileName, n, fileName = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+		print('Building %s-gram table %s from %s...' % (n, fileName, corpusFileName))
+		corpus = cipher_utils.readCipherText(corpusFileName)
+		writeNgramTable(fileName, makeNgramTable(corpus, n), n)
+	else:
+		for n in (2, 3, 4):
+			print('Building English %s-gram table %s...' % (n, ENGLISH_TABLE_FILE % (n)))
+			englishNgramTable(n)
+	print('Done.')
+
+# If ngram_score.py is run (instead of imported as a module), call the main() function
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,190 @@
+# primality.py
+# Author: Steve Dwyer
+# Fast primality testing:
+# a single gcd with the primorial of the small primes screens out most composites, then
+# Miller-Rabin with a deterministic set of bases proves primality below 3.3 x 10**24,
+# and above that the Baillie-PSW test (which has no known counterexample) is used.
+
+import math, prime_sieve
+
+# The primes below SMALL_PRIME_LIMIT, and their product, with which every candidate is screened
+SMALL_PRIME_LIMIT = 1000
+SMALL_PRIMES = prime_sieve.listPrimes(SMALL_PRIME_LIMIT)
+SMALL_PRIME_SET = frozenset(SMALL_PRIMES)
+PRIMORIAL = math.prod(SMALL_PRIMES)
+# Every composite below this has a factor below SMALL_PRIME_LIMIT, so it is caught by the screen
+SCREENED_LIMIT = SMALL_PRIME_LIMIT * SMALL_PRIME_LIMIT
+
+# Miller-Rabin with the first 13 primes as bases is deterministic below the smallest strong
+# pseudoprime to all of them, 3317044064679887385961981
+DETERMINISTIC_BASES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]
+DETERMINISTIC_LIMIT = 3317044064679887385961981
+
+def isStrongProbablePrime(n, base):
+	""" (int, int) -> bool
+
+	Return True if the odd number n > 2 is a strong probable prime to the base base,
+	that is, if it passes one round of the Miller-Rabin test with base as its witness
+
+	>>> isStrongProbablePrime(2047, 2), isStrongProbablePrime(2047, 3)
+	(True, False)
+	"""
+	# Write n - 1 as 2**r * d with d odd
+	d = n - 1
+	r = 0
+	while d % 2 == 0:
+		d //= 2
+		r += 1
+	x = pow(base, d, n)
+	if x == 1 or x == n - 1:
+		return True
+	for _ in range(r - 1):
+		x = x * x % n
+		if x == n - 1:
+			return True
+	return False
+
+def millerRabin(n, bases=DETERMINISTIC_BASES):
+	""" (int, list) -> bool
+
+	Return True if the odd number n > 2 is a strong probable prime to every base in bases
+	"""
+	for base in bases:
+		if base % n == 0:
+			continue
+		if not isStrongProbablePrime(n, base):
+			return False
+	return True
+
+def jacobi(a, n):
+	""" (int, int) -> int
+
+	Return the Jacobi symbol (a/n) for the odd positive number n
+
+	>>> jacobi(5, 21), jacobi(2, 15), jacobi(3, 9)
+	(1, 1, 0)
+	"""
+	a %= n
+	result = 1
+	while a != 0:
+		while a % 2 == 0:
+			a //= 2
+			if n % 8 in (3, 5):
+				result = -result
+		a, n = n, a
+		if a % 4 == 3 and n % 4 == 3:
+			result = -result
+		a %= n
+	return result if n == 1 else 0
+
+def isStrongLucasProbablePrime(n):
+	""" (int) -> bool
+
+	Return True if the odd number n > 2 is a strong Lucas probable prime, with the parameters
+	P = 1 and Q = (1 - D) / 4 chosen by Selfridge's method A
+
+	>>> isStrongLucasProbablePrime(5459), isStrongLucasProbablePrime(5461)
+	(True, False)
+	"""
+	root = math.isqrt(n)
+	if root * root == n:
+		return False
+	# Find the first D in 5, -7, 9, -11, ... with (D/n) = -1
+	D = 5
+	while True:
+		symbol = jacobi(D, n)
+		if symbol == -1:
+			break
+		if symbol == 0 and abs(D) != n:
+			return False
+		D = -D - 2 if D > 0 else -D + 2
+	P = 1
+	Q = (1 - D) // 4
+	# Write n + 1 as 2**s * d with d odd
+	d = n + 1
+	s = 0
+	while d % 2 == 0:
+		d //= 2
+		s += 1
+	# Step through the bits of d, doubling the index k of U_k, V_k and Q**k, adding one on each set bit
+	U, V, Qk = 1, P, Q % n
+	for bit in bin(d)[3:]:
+		U, V, Qk = U * V % n, (V * V - 2 * Qk) % n, Qk * Qk % n
+		if bit == '1':
+			U, V = P * U + V, D * U + P * V
+			# Halve U and V mod n (n is odd, so adding n makes them even)
+			U = (U + n if U % 2 else U) // 2 % n
+			V = (V + n if V % 2 else V) // 2 % n
+			Qk = Qk * Q % n
+	if U == 0 or V == 0:
+		return True
+	for _ in range(s - 1):
+		V, Qk = (V * V - 2 * Qk) % n, Qk * Qk % n
+		if V == 0:
+			return True
+	return False
+
+def isBailliePswPrime(n):
+	""" (int) -> bool
+
+	Return the Baillie-PSW test of the odd number n > 2: a strong probable prime to base 2,
+	which is also a strong Lucas probable prime. No composite is known to pass it.
+	"""
+	return isStrongProbablePrime(n, 2) and isStrongLucasProbablePrime(n)
+
+def isPrime(n):
+	""" (int) -> bool
+
+	Return True if n is a prime number. Small n are looked up, one gcd with the primorial of the
+	primes below SMALL_PRIME_LIMIT screens out most composites, Miller-Rabin with DETERMINISTIC_BASES
+	proves primality below DETERMINISTIC_LIMIT, and above that the Baillie-PSW test is used.
+
+	>>> [n for n in range(30) if isPrime(n)]
+	[2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+	>>> isPrime(2**89 - 1), isPrime(2**89 + 1)
+	(True, False)
+	"""
+	if n < SMALL_PRIME_LIMIT:
+		return n in SMALL_PRIME_SET
+	if math.gcd(n, PRIMORIAL) != 1:
+		return False
+	if n < SCREENED_LIMIT:
+		return True
+	if n < DETERMINISTIC_LIMIT:
+		return millerRabin(n)
+	return isBailliePswPrime(n)
+
+def isPrimeBatch(numbers, processes=1):
+	""" (list, int) -> list
+
+	Return a list of the isPrime result for every number in numbers. Every number is screened with
+	the primorial first, and the numbers which survive it are tested on a pool of processes
+	(processes defaults to 1, testing them here; None uses the number of CPUs).
+
+	>>> isPrimeBatch([97, 98, 2**61 - 1, 2**61 + 1])
+	[True, False, True, False]
+	"""
+	results = []
+	survivors = []
+	for index, n in enumerate(numbers):
+		if n < SMALL_PRIME_LIMIT:
+			results.append(n in SMALL_PRIME_SET)
+		elif math.gcd(n, PRIMORIAL) != 1:
+			results.append(False)
+		else:
+			results.append(None)
+			survivors.append(index)
+	if processes == 1 or len(survivors) < 2:
+		tested = [isPrime(numbers[index]) for index in survivors]
+	else:
+		# multiprocessing is imported only when needed, as it is slow to import
+		import multiprocessing
+		pool = multiprocessing.Pool(processes)
+		try:
+			tested = pool.map(isPrime, [numbers[index] for index in survivors])
+		finally:
+			pool.close()
+			pool.join()
+	for index, result in zip(survivors, tested):
+		results[index] = result
+	return results
@@ -1,33 +1,103 @@
 # Prime Number Sieve
 # Author: Al Sweigart (Hacking Secret Ciphers with Python)
 # http://inventwithpython.com/hacking (BSD Licensed)
+# Rewritten by Steve Dwyer as a segmented sieve of Eratosthenes over the odd numbers only,
+# one byte per odd number, so primes can be streamed up to 10**10 and beyond in bounded memory.
 
-import math
+import math, itertools
+
+# The number of odd numbers sieved at once, one byte each: a megabyte, small enough to stay in the L2 cache
+SEGMENT_SIZE = 1 << 20
 
 def primeSieve(sieveSize):
-	# Returns a list of prime numbers calculated using
-	# the Sieve of Erastothenes algorithm.
-	
-	sieve = [True] * sieveSize
-	sieve[0] = False # zero and one are not prime numbers
-	sieve[1] = False
-	
-	# create the sieve
-	sqrtSieveSize = int(math.sqrt(sieveSize)) + 1
-	for i in range(2, sqrtSieveSize):
-		pointer = i * 2
-		while pointer < sieveSize:
-			sieve[pointer] = False
-			pointer += i
+	""" (int) -> bytearray
+
+	Return a bytearray of sieveSize flags, calculated using the Sieve of Eratosthenes algorithm,
+	in which sieve[n] is 1 if n is a prime number and 0 otherwise
+
+	>>> [n for n, flag in enumerate(primeSieve(20)) if flag]
+	[2, 3, 5, 7, 11, 13, 17, 19]
+	"""
+	sieve = bytearray(b'\x01') * sieveSize
+	sieve[:2] = bytes(min(sieveSize, 2)) # zero and one are not prime numbers
+	# Cross off the multiples of each prime from its square, as every smaller multiple
+	# has a smaller prime factor, and has already been crossed off
+	for i in range(2, math.isqrt(max(sieveSize - 1, 0)) + 1):
+		if sieve[i]:
+			sieve[i * i::i] = bytes(len(range(i * i, sieveSize, i)))
 	return sieve
 
+def _oddSievingPrimes(limit):
+	# Returns a list of the odd primes up to and including limit, with which each segment is sieved
+	return [n for n in itertools.compress(range(limit + 1), primeSieve(limit + 1)) if n != 2]
+
+def iterPrimeSegments(stop, start=0, segmentSize=SEGMENT_SIZE):
+	""" (int, int, int) -> generator
+
+	Yield (low, flags) tuples covering the odd numbers from start up to stop, in order, where flags
+	is a bytearray in which flags[i] is 1 if low + 2 * i is prime. Only one segment of segmentSize
+	flags, and the primes up to the square root of stop, are held in memory at a time.
+	From a start of 0 or 1 the first segment begins at 1. Note that 2, the only even prime, is not
+	covered by any segment.
+	"""
+	low = max(start, 1) | 1
+	if low >= stop:
+		return
+	sievingPrimes = _oddSievingPrimes(math.isqrt(stop - 1))
+	zeros = memoryview(bytes(segmentSize))
+	while low < stop:
+		size = min(segmentSize, (stop - low + 1) // 2)
+		flags = bytearray(b'\x01') * size
+		high = low + 2 * size
+		for prime in sievingPrimes:
+			square = prime * prime
+			if square >= high:
+				break
+			# The first odd multiple of prime in the segment, but no lower than prime * prime
+			first = max(square, (low + prime - 1) // prime * prime)
+			if first % 2 == 0:
+				first += prime
+			index = (first - low) // 2
+			flags[index::prime] = zeros[:len(range(index, size, prime))]
+		if low == 1:
+			flags[0] = 0 # one is not a prime number
+		yield low, flags
+		low = high
+
+def iterPrimes(stop, start=0, segmentSize=SEGMENT_SIZE):
+	""" (int, int, int) -> generator
+
+	Yield the prime numbers n with start <= n < stop, in order, sieving segmentSize odd numbers at a time
+
+	>>> list(iterPrimes(30))
+	[2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+	>>> list(iterPrimes(130, 100, segmentSize=4))
+	[101, 103, 107, 109, 113, 127]
+	"""
+	if start <= 2 < stop:
+		yield 2
+	for low, flags in iterPrimeSegments(stop, start, segmentSize):
+		yield from itertools.compress(range(low, low + 2 * len(flags), 2), flags)
+
+def countPrimes(stop, start=0, segmentSize=SEGMENT_SIZE):
+	""" (int, int, int) -> int
+
+	Return the number of prime numbers n with start <= n < stop
+
+	>>> countPrimes(10**6)
+	78498
+	"""
+	count = 1 if start <= 2 < stop else 0
+	for low, flags in iterPrimeSegments(stop, start, segmentSize):
+		count += flags.count(1)
+	return count
+
 def listPrimes(sieveSize):
-	# Retrieve the sieve using Erastothenes' algorithm:
-	sieve = primeSieve(sieveSize)
-	
-	# Compile the list of primes
-	primes = []
-	for i in range(sieveSize):
-		if sieve[i]:
-			primes.append(i)
-	return primes
+	""" (int) -> list
+
+	Return a list of the prime numbers below sieveSize
+
+	>>> listPrimes(20)
+	[2, 3, 5, 7, 11, 13, 17, 19]
+	"""
+	return list(iterPrimes(sieveSize))
@@ -0,0 +1,223 @@
+# prime_table.py
+# Author: Steve Dwyer
+# A persistent table of the primes below a limit (by default 2**32), built once by
+# python prime_table.py [limit [table.bin]]
+# The table is a binary file: a 32 byte header, then a bitset with one bit for each odd number
+# (bit i of the bitset, counting from the least significant bit of the first byte, is set if
+# 2 * i + 1 is prime), then a rank array of uint64 counts of the set bits before each block of
+# BLOCK_BYTES bytes. Loading a table memory-maps the file, so every process using it shares the
+# same page-cached copy, and isSmallPrime, nextPrime and primePi take constant time.
+
+import sys, os, mmap, struct, array, tempfile, logger, prime_sieve
+
+# Header: magic, format version, limit, block size in bytes, byte order flag (1 = little endian)
+HEADER_FORMAT = '<4sIQII8x'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+MAGIC = b'PRMT'
+VERSION = 1
+
+# The number of bitset bytes (512 odd numbers) between the entries of the rank array
+BLOCK_BYTES = 64
+BLOCK_BITS = BLOCK_BYTES * 8
+
+# The default table holds every prime below 2**32, in 288 MB
+DEFAULT_LIMIT = 2**32
+PRIME_TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'primes.bin')
+
+# The positions of the set bits in every byte value, for iterating over the primes in the bitset
+BYTE_BIT_POSITIONS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+def packFlags(flags):
+	""" (bytearray) -> bytes
+
+	Return the bitset of the bytearray flags of 0s and 1s (whose length is a multiple of 8),
+	with flags[i] as bit i % 8 of byte i // 8
+
+	>>> packFlags(bytearray([1, 1, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1]))
+	b'\\x0b\\x80'
+	"""
+	# Each of the 8 strided slices holds one bit of every byte, which a shift puts in its place
+	packed = 0
+	for bit in range(8):
+		packed |= int.from_bytes(flags[bit::8], 'little') << bit
+	return packed.to_bytes(len(flags) // 8, 'little')
+
+def buildPrimeTable(fileName, limit=DEFAULT_LIMIT):
+	""" (str, int) -> None
+
+	Write a table of the primes below limit to the file fileName, streaming them from a segmented
+	sieve, so only one segment is held in memory at a time (besides the rank array).
+	The table is written to a temporary file in the same directory, then renamed over fileName
+	in one step, so a process loading the table in the meantime never maps a half-written file.
+	"""
+	ranks = array.array('Q')
+	rank = 0
+	descriptor, temporaryFileName = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(fileName)), suffix='.tmp')
+	try:
+		file = os.fdopen(descriptor, 'wb')
+		try:
+			file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, limit, BLOCK_BYTES, 1 if sys.byteorder == 'little' else 0))
+			# Segments are whole blocks, so no block straddles two segments
+			segmentSize = prime_sieve.SEGMENT_SIZE // BLOCK_BITS * BLOCK_BITS
+			for low, flags in prime_sieve.iterPrimeSegments(limit, 0, segmentSize):
+				if len(flags) % BLOCK_BITS:
+					flags.extend(bytes(BLOCK_BITS - len(flags) % BLOCK_BITS))
+				for start in range(0, len(flags), BLOCK_BITS):
+					ranks.append(rank)
+					rank += flags.count(1, start, start + BLOCK_BITS)
+				file.write(packFlags(flags))
+			ranks.tofile(file)
+		finally:
+			file.close()
+		os.chmod(temporaryFileName, 0o644)
+		os.replace(temporaryFileName, fileName)
+	except BaseException:
+		os.remove(temporaryFileName)
+		raise
+
+class PrimeTable:
+	"""
+	A table of the primes below a limit, memory-mapped from a file written by buildPrimeTable
+	"""
+
+	def __init__(self, fileName):
+		"""
+		Constructs a new PrimeTable by memory-mapping the file fileName
+		"""
+		file = open(fileName, 'rb')
+		try:
+			self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		finally:
+			file.close()
+		magic, version, self.limit, blockBytes, littleEndian = struct.unpack_from(HEADER_FORMAT, self._mmap)
+		if magic != MAGIC or version != VERSION or blockBytes != BLOCK_BYTES:
+			raise ValueError('%s is not a prime table file' % (fileName))
+		bitsetSize = -(-(self.limit // 2) // BLOCK_BITS) * BLOCK_BYTES
+		if len(self._mmap) != HEADER_SIZE + bitsetSize + bitsetSize // BLOCK_BYTES * 8:
+			raise ValueError('%s is truncated' % (fileName))
+		self.bits = memoryview(self._mmap)[HEADER_SIZE:HEADER_SIZE + bitsetSize]
+		if bool(littleEndian) == (sys.byteorder == 'little'):
+			self.ranks = memoryview(self._mmap)[HEADER_SIZE + bitsetSize:].cast('Q')
+		else:
+			# Written on a machine of the other byte order: fall back to a private, swapped copy
+			self.ranks = array.array('Q', self._mmap[HEADER_SIZE + bitsetSize:])
+			self.ranks.byteswap()
+
+	def _checkInTable(self, n):
+		# Raises ValueError if n is beyond the numbers held in the table
+		if n >= self.limit:
+			raise ValueError('%s is beyond the prime table, which stops at %s' % (n, self.limit))
+
+	def isSmallPrime(self, n):
+		""" (int) -> bool
+
+		Return True if n (which must be below the table's limit) is a prime number
+		"""
+		self._checkInTable(n)
+		if n % 2 == 0:
+			return n == 2
+		index = n >> 1
+		return n > 0 and self.bits[index >> 3] >> (index & 7) & 1 == 1
+
+	def primePi(self, n):
+		""" (int) -> int
+
+		Return the number of prime numbers less than or equal to n (which must be below the table's limit)
+		"""
+		self._checkInTable(n)
+		if n < 2:
+			return 0
+		# The index of the largest odd number <= n, and the bits up to it in its block
+		index = (n - 1) >> 1
+		block = index // BLOCK_BITS
+		partial = int.from_bytes(self.bits[block * BLOCK_BYTES:(index >> 3) + 1], 'little')
+		partial &= (1 << (index - block * BLOCK_BITS + 1)) - 1
+		# The rank counts the odd primes, so 2 is added
+		return 1 + self.ranks[block] + bin(partial).count('1')
+
+	def nextPrime(self, n):
+		""" (int) -> int
+
+		Return the smallest prime number greater than n, raising ValueError if it is beyond the table
+		"""
+		if n < 2:
+			self._checkInTable(2)
+			return 2
+		index = (n + 1) >> 1
+		self._checkInTable(2 * index + 1)
+		bits = self.bits
+		byteIndex = index >> 3
+		value = bits[byteIndex] >> (index & 7) << (index & 7)
+		while not value:
+			byteIndex += 1
+			if byteIndex == len(bits):
+				raise ValueError('the next prime after %s is beyond the prime table, which stops at %s' % (n, self.limit))
+			value = bits[byteIndex]
+		prime = 2 * (byteIndex * 8 + BYTE_BIT_POSITIONS[value][0]) + 1
+		self._checkInTable(prime)
+		return prime
+
+	def iterPrimes(self, start, stop):
+		""" (int, int) -> generator
+
+		Yield the prime numbers p with start <= p < stop (which must be within the table's limit), in order
+		"""
+		stop = min(stop, self.limit)
+		if start >= stop:
+			return
+		if start <= 2 < stop:
+			yield 2
+		bits = self.bits
+		# Each byte holds the 8 odd numbers from 16 * byteIndex + 1
+		firstByte = max(start, 0) >> 4
+		lastByte = min((stop - 1) >> 4, len(bits) - 1)
+		for byteIndex in range(firstByte, lastByte + 1):
+			value = bits[byteIndex]
+			if value:
+				base = byteIndex * 16 + 1
+				for bit in BYTE_BIT_POSITIONS[value]:
+					prime = base + 2 * bit
+					if start <= prime < stop:
+						yield prime
+
+	def close(self):
+		"""
+		Releases the memory map
+		"""
+		self.bits.release()
+		if isinstance(self.ranks, memoryview):
+			self.ranks.release()
+		self._mmap.close()
+
+# Tables already loaded by this process, by file name
+_loadedTables = {}
+
+def loadPrimeTable(fileName=PRIME_TABLE_FILE, build=False):
+	""" (str, bool) -> PrimeTable
+
+	Return the PrimeTable held in fileName, memory-mapping it the first time it is loaded.
+	If the file does not exist, raise FileNotFoundError, unless build is True, in which case
+	the table of the primes below DEFAULT_LIMIT (288 MB, taking about half a minute) is built first.
+	"""
+	if fileName not in _loadedTables:
+		if not os.path.exists(fileName):
+			if not build:
+				raise FileNotFoundError('prime table %s does not exist: build it with python prime_table.py, or pass build=True' % (fileName))
+			logger.warn('Building %s, the table of the primes below %s, which may take a while...', fileName, DEFAULT_LIMIT)
+			buildPrimeTable(fileName)
+		_loadedTables[fileName] = PrimeTable(fileName)
+	return _loadedTables[fileName]
+
+def main():
+	# Builds a prime table: python prime_table.py [limit [table.bin]]
+	limit = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LIMIT
+	fileName = sys.argv[2] if len(sys.argv) > 2 else PRIME_TABLE_FILE
+	print('Building prime table %s of the primes below %s...' % (fileName, limit))
+	buildPrimeTable(fileName, limit)
+	table = PrimeTable(fileName)
+	print('Done: %s primes.' % (table.primePi(limit - 1) if limit > 1 else 0))
+	table.close()
+
+# If prime_table.py is run (instead of imported as a module), call the main() function
+if __name__ == '__main__':
+	main()
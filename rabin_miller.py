@@ -4,7 +4,7 @@
 # Adapted by Steve Dwyer to correspond more closely to the pseudocode example set out at:
 # https://en.wikipedia.org/wiki/Miller–Rabin_primality_test#Example
 
-import random
+import random, secrets, prime_sieve, primality
 
 def rabinMiller(n, k=5):
 	# Returns True if n is probably prime
@@ -41,31 +41,90 @@ def rabinMiller(n, k=5):
 	return probablyPrime
 
 def isPrime(n):
-	# Return True is n is a prime number. This function does a quicker
-	# prime number check before calling rabinMiller().
-	
-	if (n < 2):
-		return False # 0, 1 and negative numbers are not prime
-	
-	# About 1/3 of the  time we can quickly determine whether n is not prime
-	# by dividing by the first few dozen prime numbers. This is quicker than rabinMiller(),
-	# but unlike rabinMiller() is not guaranteed to prove that a number is not a prime.
-	lowPrimes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97, 101, 103, 107, 109, 113, 127, 131, 137, 139, 149, 151, 157, 163, 167, 173, 179, 181, 191, 193, 197, 199, 211, 223, 227, 229, 233, 239, 241, 251, 257, 263, 269, 271, 277, 281, 283, 293, 307, 311, 313, 317, 331, 337, 347, 349, 353, 359, 367, 373, 379, 383, 389, 397, 401, 409, 419, 421, 431, 433, 439, 443, 449, 457, 461, 463, 467, 479, 487, 491, 499, 503, 509, 521, 523, 541, 547, 557, 563, 569, 571, 577, 587, 593, 599, 601, 607, 613, 617, 619, 631, 641, 643, 647, 653, 659, 661, 673, 677, 683, 691, 701, 709, 719, 727, 733, 739, 743, 751, 757, 761, 769, 773, 787, 797, 809, 811, 821, 823, 827, 829, 839, 853, 857, 859, 863, 877, 881, 883, 887, 907, 911, 919, 929, 937, 941, 947, 953, 967, 971, 977, 983, 991, 997]
+	# Return True is n is a prime number. The small primes are screened with a single gcd
+	# against their precomputed primorial, then primality.isPrime() proves the result
+	# deterministically (or with the Baillie-PSW test beyond 3.3 x 10**24), rather than
+	# with the random witnesses of rabinMiller().
+	return primality.isPrime(n)
+
+# Candidates for a large prime are sieved by every odd prime below SIEVE_LIMIT before any Rabin-Miller test
+SIEVE_LIMIT = 10000
+# The number of consecutive odd candidates sieved at once
+SIEVE_WINDOW = 4096
+
+# The odd primes below SIEVE_LIMIT, listed the first time a large prime is generated
+_sievePrimes = []
+
+def getSievePrimes():
+	# Returns the odd primes below SIEVE_LIMIT, with which large prime candidates are sieved
+	if not _sievePrimes:
+		_sievePrimes.extend(prime_sieve.listPrimes(SIEVE_LIMIT)[1:])
+	return _sievePrimes
 
-	if n in lowPrimes:
-		return True
+def sieveWindow(start, window=SIEVE_WINDOW):
+	""" (int, int) -> bytearray
 	
-	# See if any of the low primes can divide n
-	for prime in lowPrimes:
-		if n % prime == 0:
-			return False
+	Return a bytearray of window flags, one for each of the odd candidates start, start + 2, ...,
+	start + 2 * (window - 1) (start must be odd), which is 0 for every candidate divisible by an odd
+	prime below SIEVE_LIMIT (other than the prime itself), and 1 for the survivors
 	
-	# If all else fails, call rabinMiller() to determine if n is a prime
-	return rabinMiller(n)
+	>>> list(sieveWindow(101, 5))
+	[1, 1, 0, 1, 1]
+	"""
+	flags = bytearray(b'\x01') * window
+	for prime in getSievePrimes():
+		# start + 2 * i is divisible by prime when i = -start / 2 (mod prime)
+		first = (-start * ((prime + 1) // 2)) % prime
+		if start + 2 * first == prime:
+			first += prime
+		flags[first::prime] = bytes(len(range(first, window, prime)))
+	return flags
 
 def generateLargePrime(keysize=1024):
 	# Return a random prime number of keysize bits is size.
+	# A random odd start is drawn from the operating system's CSPRNG, then the window of odd numbers
+	# following it is sieved by the small primes, and only the survivors are tested with
+	# primality.isPrime(), in order, until one passes. If the window runs out, the search carries on into the next window,
+	# or starts again from a new random start if it would run past keysize bits.
 	while True:
-		n = random.randrange(2**(keysize-1), 2**keysize)
-		if isPrime(n):
-			return n
+		start = secrets.randbits(keysize) | (1 << (keysize - 1)) | 1
+		while start < 2**keysize:
+			flags = sieveWindow(start)
+			position = flags.find(1)
+			while position != -1:
+				n = start + 2 * position
+				if n >= 2**keysize:
+					break
+				if primality.isPrime(n):
+					return n
+				position = flags.find(1, position + 1)
+			start += 2 * SIEVE_WINDOW
+
+def _generateLargePrimeArgs(keysize):
+	# Calls generateLargePrime, for Pool.map
+	return generateLargePrime(keysize)
+
+def generateLargePrimes(keysize=1024, count=2, processes=None):
+	""" (int, int, int) -> list
+	
+	Return a list of count distinct random primes of keysize bits, generated concurrently
+	on a pool of processes (processes defaults to the number of CPUs, and 1 generates them here)
+	"""
+	primes = []
+	while len(primes) < count:
+		needed = count - len(primes)
+		if processes == 1:
+			found = [generateLargePrime(keysize) for _ in range(needed)]
+		else:
+			# multiprocessing is imported only when needed, as it is slow to import
+			import multiprocessing
+			pool = multiprocessing.Pool(processes)
+			try:
+				found = pool.map(_generateLargePrimeArgs, [keysize] * needed)
+			finally:
+				pool.close()
+				pool.join()
+		for prime in found:
+			if prime not in primes:
+				primes.append(prime)
+	return primes
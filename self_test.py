@@ -0,0 +1,82 @@
+# self_test.py
+# Author: Steve Dwyer
+# A registry of the sanity checks of each cipher module, run on demand rather than on import:
+# python self_test.py [module ...]
+# or, from any module which registers self-tests: python vigenere.py --self-test
+
+import sys, logger
+
+# The modules which register self-tests, in the order they are checked
+SELF_TEST_MODULES = ['cipher_utils', 'vigenere', 'simple_sub', 'bifid', 'hill', 'baconian']
+
+# Registered self-tests, as (module name, description, function) tuples
+_selfTests = []
+
+class SelfTestError(Exception):
+	"""
+	Raised by a self-test when a method fails its check, naming the method which failed
+	"""
+	pass
+
+def register(description):
+	""" (str) -> function
+	
+	Return a decorator which registers a self-test function, described by description
+	(for example 'decryption logic'). The function should raise SelfTestError, naming
+	the method under test, if the check fails.
+	"""
+	def decorator(function):
+		_selfTests.append((function.__module__, description, function))
+		return function
+	return decorator
+
+def check(condition, method):
+	""" (bool, str) -> None
+	
+	Raise SelfTestError for the method method unless condition holds
+	"""
+	if not condition:
+		raise SelfTestError(method)
+
+def runSelfTests(modules=None):
+	""" (list) -> bool
+	
+	Import the modules named in modules (by default, every module in SELF_TEST_MODULES),
+	run each of their registered self-tests at the ERROR logging level, and report the results.
+	Return True if every self-test passed.
+	"""
+	modules = SELF_TEST_MODULES if modules is None else modules
+	for moduleName in modules:
+		__import__(moduleName)
+	level = logger.logger.level
+	logger.setLevel(logger.ERROR)
+	passed = True
+	try:
+		for moduleName in modules:
+			for testModule, description, function in _selfTests:
+				if testModule != moduleName:
+					continue
+				print('Checking %s on %s module...' % (description, moduleName))
+				try:
+					function()
+				except SelfTestError as error:
+					print('Error testing %s method!!! Check your code before continuing...' % (error))
+					passed = False
+				else:
+					print('%s OK.' % (description))
+	finally:
+		logger.setLevel(level)
+	return passed
+
+def main(modules=None):
+	# Runs the self-tests of the modules named on the command line (or all of them),
+	# exiting with a non-zero status if any fails
+	if modules is None:
+		modules = [arg for arg in sys.argv[1:] if not arg.startswith('-')] or None
+	sys.exit(0 if runSelfTests(modules) else 1)
+
+# If self_test.py is run (instead of imported as a module), call the main() function
+if __name__ == '__main__':
+	# Run through the imported self_test module, with which the cipher modules register their self-tests
+	import self_test
+	self_test.main()
@@ -1,47 +1,192 @@
 # simple_sub.py
 # Author: Steve Dwyer
 
-import sys, logger, cipher_utils
+import sys, random, logger, cipher_utils, ngram_score, self_test
 
 def decryptSimpleSubstitutionCipher(charList, keyString, dummy=None):
 	""" (list, str, str) -> str
 	
 	Decrypt the passed ciphertext list charList, encrypted with simple substitution cipher
 	using the passed key keyString. Dummy characters are defined by the argument dummy,
-	which, if set, will simply display the ciphertext character
+	which, if set, will simply display the ciphertext character.
+	charList may also be a str or a cipher_utils.CipherText
 	
 	>>> decryptSimpleSubstitutionCipher(['A', 'B', 'C', ' ', 'Z'], 'KEYABCDFGHIJLMNOPQRSTUVWX.', dummy='.')
 	'key Z'
 	"""
-	decryptedCharList = []
-	logger.debug('Cipher\tPlain')
-	for char in charList:
-		cipherOrdinal = cipher_utils.cipherLetterToOrdinal(char)
-		if cipherOrdinal in range(len(keyString)):
-			plainTextLetter = keyString[cipherOrdinal].lower()
+	if isinstance(charList, cipher_utils.CipherText):
+		# Decode the ordinals straight through an alphabet built from the key
+		alphabet = []
+		for ordinal in range(26):
+			plainTextLetter = keyString[ordinal].lower() if ordinal < len(keyString) else cipher_utils.integerToChr(ordinal)
 			if plainTextLetter == dummy:
-				plainTextLetter = char
+				plainTextLetter = cipher_utils.integerToChr(ordinal)
+			alphabet.append(plainTextLetter)
+		logger.debug('Cipher\t%s\nPlain\t%s', cipher_utils.UPPERCASE, ''.join(alphabet))
+		return charList.toText(''.join(alphabet))
+	# Build one translation table for both cases of every cipher letter, then apply it in one pass
+	table = {}
+	for cipherOrdinal in range(min(len(keyString), 26)):
+		plainTextLetter = keyString[cipherOrdinal].lower()
+		for char in (cipher_utils.integerToChr(cipherOrdinal), cipher_utils.ordinalToClearLetter(cipherOrdinal)):
+			table[ord(char)] = char if plainTextLetter == dummy else plainTextLetter
+	if logger.isEnabledFor(logger.DEBUG):
+		logger.debug('Cipher\tPlain\n%s', '\n'.join('%s\t%s' % (chr(char), table[char]) for char in sorted(table)))
+	return ''.join(charList).translate(table)
+
+class SubstitutionFitness:
+	"""
+	The bigram fitness of the decryption of one ciphertext under a simple substitution key,
+	kept up to date incrementally as pairs of key letters are swapped.
+	
+	The ciphertext is reduced once to a table of its bigram counts, so the fitness of a key is
+	the sum over cipher bigrams of count * log probability of the decrypted bigram. Swapping
+	the plaintext letters of two cipher letters only changes the terms of bigrams containing
+	one of those two cipher letters, so each swap is rescored in O(26) steps, however long
+	the ciphertext is.
+	"""
+	
+	def __init__(self, charList, logProbabilities):
+		"""
+		Constructs the fitness for the ciphertext charList, scored with logProbabilities,
+		a flat table of 676 bigram log probabilities (such as ngram_score.englishNgramTable(2).logProbabilities)
+		"""
+		ordinals = cipher_utils.CipherText(charList).letters().ordinals
+		self.bigramCounts = [0] * 676
+		for first, second in zip(ordinals, ordinals[1:]):
+			self.bigramCounts[first * 26 + second] += 1
+		self.logProbabilities = logProbabilities
+		# The cipher letters which actually occur in a bigram, the only ones worth rescoring
+		self.cipherOrdinals = [ordinal for ordinal in range(26) if ordinals.count(ordinal)]
+		self.key = list(range(26))
+		self.score = self.fullScore()
+	
+	def setKey(self, key):
+		"""
+		Sets the decryption key, a list mapping each cipher ordinal to its plaintext ordinal
+		"""
+		self.key = list(key)
+		self.score = self.fullScore()
+	
+	def fullScore(self):
+		"""
+		Returns the fitness of the current key, rescoring every bigram
+		"""
+		score = 0.0
+		key = self.key
+		for first in self.cipherOrdinals:
+			for second in self.cipherOrdinals:
+				count = self.bigramCounts[first * 26 + second]
+				if count:
+					score += count * self.logProbabilities[key[first] * 26 + key[second]]
+		return score
+	
+	def _letterScore(self, x, y):
+		# The sum of the terms for every bigram containing cipher letter x or y
+		key = self.key
+		counts = self.bigramCounts
+		logProbabilities = self.logProbabilities
+		plainX = key[x] * 26
+		plainY = key[y] * 26
+		score = 0.0
+		for other in self.cipherOrdinals:
+			plainOther = key[other]
+			score += counts[x * 26 + other] * logProbabilities[plainX + plainOther]
+			score += counts[y * 26 + other] * logProbabilities[plainY + plainOther]
+			if other != x and other != y:
+				score += counts[other * 26 + x] * logProbabilities[plainOther * 26 + key[x]]
+				score += counts[other * 26 + y] * logProbabilities[plainOther * 26 + key[y]]
+		return score
+	
+	def swapDelta(self, x, y):
+		"""
+		Returns the change in fitness if the plaintext letters of cipher letters x and y were swapped
+		"""
+		before = self._letterScore(x, y)
+		key = self.key
+		key[x], key[y] = key[y], key[x]
+		after = self._letterScore(x, y)
+		key[x], key[y] = key[y], key[x]
+		return after - before
+	
+	def swap(self, x, y, delta=None):
+		"""
+		Swaps the plaintext letters of cipher letters x and y, updating the fitness
+		"""
+		if delta is None:
+			delta = self.swapDelta(x, y)
+		self.key[x], self.key[y] = self.key[y], self.key[x]
+		self.score += delta
+	
+	def keyString(self):
+		"""
+		Returns the current key in the form taken by decryptSimpleSubstitutionCipher
+		"""
+		return ''.join(cipher_utils.integerToChr(plainOrdinal) for plainOrdinal in self.key)
+
+def solveSimpleSubstitution(charList, restarts=20, logProbabilities=None, seed=None):
+	""" (list, integer, list, integer) -> tuple
+	
+	Recover the key of the simple substitution ciphertext charList by hill climbing over key swaps,
+	scoring keys by bigram fitness (the English bigram table of ngram_score, unless logProbabilities
+	is given). The first climb starts from the key matching the cipher letter frequencies to
+	English; each of the restarts starts from a random shuffle of the best key found so far.
+	Return a (fitness, key) tuple, with the key in the form taken by decryptSimpleSubstitutionCipher.
+	
+	>>> solveSimpleSubstitution(cipher_utils.readFile('2016/8b/cipher.txt'))[1]
+	'DIJAKLMNFOPQECRSTUVWXYZGBH'
+	"""
+	if logProbabilities is None:
+		logProbabilities = ngram_score.englishNgramTable(2).logProbabilities
+	generator = random.Random(seed)
+	cipherText = cipher_utils.CipherText(charList).letters()
+	fitness = SubstitutionFitness(cipherText, logProbabilities)
+	# Start by mapping the cipher letters, most frequent first, to English letters in order of frequency
+	englishFrequencies = cipher_utils.letterFrequencies()
+	englishOrder = sorted(range(26), key=lambda ordinal: -englishFrequencies[ordinal])
+	counts = cipherText.letterCounts()
+	cipherOrder = sorted(range(26), key=lambda ordinal: -counts[ordinal])
+	startKey = [0] * 26
+	for cipherOrdinal, plainOrdinal in zip(cipherOrder, englishOrder):
+		startKey[cipherOrdinal] = plainOrdinal
+	bestScore, bestKey = None, startKey
+	evaluations = 0
+	for attempt in range(restarts + 1):
+		if attempt == 0:
+			fitness.setKey(startKey)
 		else:
-			plainTextLetter = char
-		decryptedCharList.append(plainTextLetter)
-		logger.debug('%s\t%s' % (char, plainTextLetter))
-	return ''.join(decryptedCharList)
+			key = list(bestKey)
+			for x in range(26):
+				y = generator.randrange(26)
+				key[x], key[y] = key[y], key[x]
+			fitness.setKey(key)
+		improved = True
+		while improved:
+			improved = False
+			for x in range(26):
+				for y in range(x + 1, 26):
+					delta = fitness.swapDelta(x, y)
+					evaluations += 1
+					if delta > 1e-9:
+						fitness.swap(x, y, delta)
+						improved = True
+		logger.info('attempt %s: fitness %s, key %s', attempt, fitness.score, fitness.keyString())
+		if bestScore is None or fitness.score > bestScore:
+			bestScore, bestKey = fitness.score, list(fitness.key)
+	logger.info('%s key evaluations', evaluations)
+	fitness.setKey(bestKey)
+	return (fitness.score, fitness.keyString())
 
-# Always perform a sanity check first on the known example cipher:
-print('Checking decryption logic on simple_sub module...')
-logger.setLevel(logger.ERROR)
-if decryptSimpleSubstitutionCipher(['A', 'B', 'C', ' ', 'Z'], 'KEYABCDFGHIJLMNOPQRSTUVWX.') != 'key .':
-	print('Error testing decryptSimpleSubstitutionCipher(charList, keyString) method!!! Check your code before continuing...')
-	sys.exit()
-elif decryptSimpleSubstitutionCipher(['A', 'B', 'C', ' ', 'Z'], 'KEYABCDFGHIJLMNOPQRSTUVWX.', dummy='.') != 'key Z':
-	print('Error testing decryptSimpleSubstitutionCipher(charList, keyString) method!!! Check your code before continuing...')
-	sys.exit()
-else:
-	print('decryption logic OK.')
-logger.setLevel(logger.ERROR)
+# Sanity checks on the known example cipher, run on demand by self_test
+@self_test.register('decryption logic')
+def _selfTestDecryption():
+	self_test.check(decryptSimpleSubstitutionCipher(['A', 'B', 'C', ' ', 'Z'], 'KEYABCDFGHIJLMNOPQRSTUVWX.') == 'key .', 'decryptSimpleSubstitutionCipher(charList, keyString)')
+	self_test.check(decryptSimpleSubstitutionCipher(['A', 'B', 'C', ' ', 'Z'], 'KEYABCDFGHIJLMNOPQRSTUVWX.', dummy='.') == 'key Z', 'decryptSimpleSubstitutionCipher(charList, keyString)')
 
 # if simple_sub.py is run, instead of being imported as a module,
 # call the main() function
 
 if __name__ == '__main__':
+	if '--self-test' in sys.argv:
+		self_test.main(['simple_sub'])
 	main()
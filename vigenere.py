@@ -2,7 +2,7 @@
 # Author: Steve Dwyer
 #TODO Fix Vigenere cipher (A=0, not 1)
 
-import sys, logger, cipher_utils
+import sys, heapq, logger, cipher_utils, self_test
 
 def createSubList(charList, k):
 	""" (list, integer) -> list
@@ -20,18 +20,137 @@ def createSubList(charList, k):
 		subListIndex += k
 		if subListIndex >= n:
 			done = True
-	logger.info('\t\tk=%s : chars = %s' % (k, ''.join(subList)))
+	if logger.isEnabledFor(logger.INFO):
+		logger.info('\t\tk=%s : chars = %s', k, ''.join(subList))
 	return subList
 
 def displayIocTable(charList, maxKeyLength):
-	# Displays a list of iocs for each possible key length,
-	# from 1 (Simple Caesar Shift) to maxKeyLength
-	print('k\tioc')
-	print('=\t===')
-	for k in range(1, maxKeyLength+1):
-		subList = createSubList(charList, k)
-		iocK = cipher_utils.ioc(subList)
-		print('%s\t%s' % (k, iocK))
+	# Displays a list of the mean column iocs for each possible key length,
+	# from 1 (Simple Caesar Shift) to maxKeyLength, and returns the ranked key lengths
+	rankedPeriods = detectKeyLength(charList, maxKeyLength)
+	print('k\tioc\tkasiski')
+	print('=\t===\t=======')
+	for period, meanIoc, kasiskiCount in sorted(rankedPeriods):
+		print('%s\t%s\t%s' % (period, meanIoc, kasiskiCount))
+	return rankedPeriods
+
+# The expected ioc of English text, and of uniformly random letters
+ENGLISH_IOC = 0.0667
+RANDOM_IOC = 1 / 26
+# Periods whose columns are shorter than this have too noisy an ioc to rank with the rest
+MIN_COLUMN_LENGTH = 20
+
+def _sampleOrdinals(charList, sampleSize):
+	# Returns the ordinals of the first sampleSize letters of charList, logging when the rest are left out
+	ordinals = cipher_utils.CipherText(charList).letters().ordinals
+	if len(ordinals) > sampleSize:
+		logger.info('Using only the first %s of %s letters', sampleSize, len(ordinals))
+	return ordinals[:sampleSize]
+
+def periodIocs(charList, maxPeriod, sampleSize=20000):
+	""" (list, integer, integer) -> list
+	
+	Return the mean column ioc for every period from 1 to maxPeriod, as a list indexed
+	by period (entry 0 is unused). Each column is a strided slice of one ordinal buffer,
+	counted with bytes.count, rather than a new sublist and frequency dictionary.
+	Only the first sampleSize letters are used, which is plenty for a stable estimate
+	and bounds the running time on very long texts.
+	"""
+	ordinals = _sampleOrdinals(charList, sampleSize)
+	iocs = [0.0]
+	for period in range(1, maxPeriod + 1):
+		columnIocs = []
+		for column in range(period):
+			columnOrdinals = ordinals[column::period]
+			n = len(columnOrdinals)
+			if n < 2:
+				continue
+			coincidences = 0
+			for ordinal in range(26):
+				F = columnOrdinals.count(ordinal)
+				coincidences += F * (F - 1)
+			columnIocs.append(coincidences / (n * (n - 1)))
+		iocs.append(sum(columnIocs) / len(columnIocs) if columnIocs else 0.0)
+	return iocs
+
+def repeatedNgrams(charList, n=3, sampleSize=20000):
+	""" (list, integer, integer) -> dictionary
+	
+	Return a dictionary of every n-gram (as a bytes object of ordinals) which occurs more than once
+	in the first sampleSize letters of charList, and the list of positions it occurs at
+	
+	>>> repeatedNgrams('THEXTHE')
+	{b'\\x13\\x07\\x04': [0, 4]}
+	"""
+	ordinals = _sampleOrdinals(charList, sampleSize)
+	positions = {}
+	for position in range(len(ordinals) - n + 1):
+		ngram = ordinals[position:position + n]
+		if ngram in positions:
+			positions[ngram].append(position)
+		else:
+			positions[ngram] = [position]
+	return dict((ngram, ngramPositions) for ngram, ngramPositions in positions.items() if len(ngramPositions) > 1)
+
+def kasiskiFactorCounts(repeats, maxPeriod):
+	""" (dictionary, integer) -> list
+	
+	Return, for every period from 1 to maxPeriod, the number of spacings between consecutive
+	occurrences of the repeated n-grams in repeats (see repeatedNgrams) which are a
+	multiple of that period, as a list indexed by period (entry 0 is unused)
+	
+	>>> kasiskiFactorCounts({b'\\x13\\x07\\x04': [0, 4]}, 4)
+	[0, 1, 1, 0, 1]
+	"""
+	spacings = []
+	for positions in repeats.values():
+		for index in range(1, len(positions)):
+			spacings.append(positions[index] - positions[index - 1])
+	counts = [0]
+	for period in range(1, maxPeriod + 1):
+		counts.append(sum(1 for spacing in spacings if spacing % period == 0))
+	return counts
+
+def detectKeyLength(text, maxPeriod=20, sampleSize=20000):
+	""" (str, integer, integer) -> list
+	
+	Return a ranked list of the likely key lengths of the Vigenere ciphertext text, from
+	1 to maxPeriod, as (period, mean column ioc, Kasiski spacing count) tuples. Only the first
+	sampleSize letters of text are examined.
+	Periods whose columns hold at least MIN_COLUMN_LENGTH letters are ranked first: those whose
+	mean column ioc is within 10% of the best of them come first, by decreasing Kasiski spacing
+	count and then shortest first, so the key length is ranked ahead of its multiples (which share
+	fewer of its spacings); the remaining periods follow in order of decreasing ioc. Periods with
+	shorter columns, whose ioc is inflated by the small samples, are ranked last.
+	A text of fewer than MIN_COLUMN_LENGTH letters leaves no period with long enough columns,
+	so every period is ranked by its ioc alone (shortest first among equals).
+	Raise ValueError if maxPeriod is less than 1.
+	
+	>>> detectKeyLength(cipher_utils.readFile('example.txt'), 12)[0]
+	(6, 0.06616982557016086, 150)
+	>>> detectKeyLength(cipher_utils.readFile('example.txt'), 300)[0]
+	(6, 0.06616982557016086, 150)
+	>>> detectKeyLength('ABCABCABC', 3)
+	[(3, 1.0, 4), (1, 0.25, 4), (2, 0.18333333333333335, 0)]
+	"""
+	if maxPeriod < 1:
+		raise ValueError('maxPeriod must be at least 1, not %s' % (maxPeriod))
+	iocs = periodIocs(text, maxPeriod, sampleSize)
+	kasiskiCounts = kasiskiFactorCounts(repeatedNgrams(text, 3, sampleSize), maxPeriod)
+	periods = [(period, iocs[period], kasiskiCounts[period]) for period in range(1, maxPeriod + 1)]
+	letterCount = min(len(cipher_utils.CipherText(text).letters()), sampleSize)
+	maxReliablePeriod = letterCount // MIN_COLUMN_LENGTH
+	if maxReliablePeriod == 0:
+		return sorted(periods, key=lambda entry: (-entry[1], entry[0]))
+	reliable = [entry for entry in periods if entry[0] <= maxReliablePeriod]
+	unreliable = [entry for entry in periods if entry[0] > maxReliablePeriod]
+	bestIoc = max(entry[1] for entry in reliable)
+	threshold = bestIoc - (bestIoc - RANDOM_IOC) * 0.1
+	englishLike = sorted((entry for entry in reliable if entry[1] >= threshold), key=lambda entry: (-entry[2], entry[0]))
+	others = sorted((entry for entry in reliable if entry[1] < threshold), key=lambda entry: entry[1], reverse=True)
+	unreliable.sort(key=lambda entry: entry[1], reverse=True)
+	logger.info('key length candidates: %s', englishLike)
+	return englishLike + others + unreliable
 
 def displaySubkeyFrequencies(charList, keyLength):
 	# Displays a sorted list of the frequency for each subkey, with key length keyLength
@@ -58,7 +177,7 @@ def deriveVigenereKeyPhraseFromCrib(cipherChars, crib):
 		caesarShift = (cipherCharOrdinal - cipher_utils.cipherLetterToOrdinal(crib[index]) - 1) % 26
 		keyChar = cipher_utils.ordinalToClearLetter(caesarShift).upper()
 		keyPhrase.append(keyChar)
-		logger.info('Cipher character %s (%s) should be %s (%s),\tCaesar Shift for sub key = %s,\tkeyChar = %s' % (cipherChar, cipherCharOrdinal+1, crib[index], cipherLetterToOrdinal(crib[index]) + 1, caesarShift+1, keyChar))
+		logger.info('Cipher character %s (%s) should be %s (%s),\tCaesar Shift for sub key = %s,\tkeyChar = %s', cipherChar, cipherCharOrdinal+1, crib[index], cipherLetterToOrdinal(crib[index]) + 1, caesarShift+1, keyChar)
 		index += 1
 	return ''.join(keyPhrase)
 
@@ -79,35 +198,150 @@ def deriveVigenereKeyPhrase(frequentChars):
 		caesarShift = (frequentCharOrdinal - 5) % 26 # 'E' = 5
 		keyChar = cipher_utils.ordinalToClearLetter(caesarShift).upper()
 		keyPhrase.append(keyChar)
-		logger.info('Frequent character %s (%s) should be E (5),\tCaesar Shift for sub key = %s,\tkeyChar = %s' % (frequentChar, frequentCharOrdinal+1, caesarShift+1, keyChar))
+		logger.info('Frequent character %s (%s) should be E (5),\tCaesar Shift for sub key = %s,\tkeyChar = %s', frequentChar, frequentCharOrdinal+1, caesarShift+1, keyChar)
 	return ''.join(keyPhrase)
 
 def decryptVigenere(charList, keyString):
 	""" (list, str) -> str
 	
 	Decrypt the passed ciphertext list charList, encrypted with the Vigenere cipher
-	using the passed key keyString.
+	using the passed key keyString. charList may also be a str or a cipher_utils.CipherText;
+	any non-letters are passed through unchanged.
 	
 	>>> decryptVigenere(['X', 'S', 'F', 'J', 'D', 'J', 'M', 'N', 'R', 'F', 'R', 'U', 'D', 'J', 'V', 'L', 'M', 'Y', 'F', 'T', 'G', 'W', 'W', 'H', 'P', 'T', 'U', 'D', 'I', 'A', 'H', 'W', 'R', 'M', 'S', 'X', 'X', 'A', 'H', 'J', 'D', 'N', 'B', 'R', 'H', 'Q', 'T', 'O', 'F', 'F', 'N', 'W', 'F', 'G', 'H', 'G', 'L', 'D', 'J', 'J', 'A', 'T', 'Q', 'W', 'H', 'U', 'E', 'Q', 'E', 'M', 'D', 'M', 'H', 'R', 'H', 'L', 'M', 'C', 'G', 'L', 'Z', 'A', 'Y', 'B', 'T', 'H', 'U', 'W', 'I', 'C', 'M', 'H', 'D', 'J', 'I', 'C', 'G', 'F', 'V', 'Z', 'T', 'J', 'H', 'W', 'R', 'F', 'Y', 'B', 'X', 'B', 'H', 'T', 'T', 'L', 'X', 'A', 'H', 'F', 'L', 'Y', 'M', 'H', 'D', 'K', 'M', 'Z', 'K', 'T', 'P', 'S', 'S', 'U', 'M', 'R', 'H', 'F', 'H', 'L', 'R', 'U', 'W', 'A', 'T', 'H', 'U', 'J', 'V', 'L', 'T', 'Q', 'L', 'Z', 'S', 'G', 'S', 'N', 'A', 'F', 'W', 'L', 'W', 'U', 'G', 'X', 'D', 'U', 'Y', 'C', 'H', 'S', 'W', 'Z', 'J', 'W', 'H', 'S', 'I', 'A', 'I', 'Y', 'G', 'Y', 'L', 'S', 'Q', 'C', 'M', 'D', 'D', 'F', 'I', 'M', 'X', 'H', 'X', 'J', 'N', 'N', 'R', 'Y', 'R', 'E', 'F', 'E', 'X', 'N', 'W', 'H', 'T', 'M', 'L', 'N', 'E', 'D', 'J', 'C', 'Y', 'D', 'R', 'M', 'H', 'I', 'G', 'X', 'L', 'V', 'J', 'L', 'X', 'Q', 'H', 'U', 'Y', 'L', 'H', 'S', 'L', 'U', 'Y', 'L', 'T', 'S', 'V', 'S', 'H', 'N', 'B', 'T', 'Q', 'K', 'F', 'H', 'W', 'T', 'Q', 'D', 'N', 'H', 'X', 'U', 'D', 'Q', 'R', 'Y', 'G', 'Y', 'V', 'S', 'Q', 'F', 'M', 'M', 'R', 'K', 'J', 'Q', 'H', 'Z', 'O', 'V', 'S', 'I', 'M', 'G', 'H', 'H', 'T', 'M', 'L', 'N', 'E', 'D', 'J', 'Q', 'B', 'Y', 'K', 'G', 'Z', 'N', 'X', 'S', 'F', 'J', 'D', 'J', 'M', 'N', 'R', 'F', 'X', 'U', 'B', 'I', 'G', 'J', 'R', 'U', 'K', 'P', 'P', 'S', 'S', 'O', 'E', 'N', 'V', 'S', 'X', 'Y', 'G', 'N', 'R', 'J', 'Q', 'Y', 'V', 'Y', 'X', 'J', 'J', 'L', 'B', 'S', 'F', 'J', 'D', 'J', 'M', 'T', 'J', 'J', 'F', 'J', 'A', 'D', 'D', 'L', 'Y', 'B', 'X', 'Z', 'Q', 'A', 'A', 'Y', 'K', 'X', 'L', 'L', 'D', 'I', 'Y', 'X', 'X', 'J', 'W', 'Y', 'R', 'F', 'W', 'A', 'Y', 'M', 'L', 'N', 'P', 'H', 'Q', 'Y', 'L', 'Y', 'H', 'F', 'H', 'L', 'R', 'U', 'W', 'A', 'T', 'H', 'B', 'X', 'D', 'D', 'Q', 'U', 'U', 'T', 'X', 'L', 'Y', 'L', 'T', 'S', 'V', 'X', 'T', 'L', 'F', 'N', 'Q', 'Y', 'N', 'H', 'M', 'J', 'O', 'D', 'N', 'A', 'B', 'G', 'O', 'W', 'S', 'O', 'F', 'G', 'H', 'J', 'X', 'I', 'K', 'Y', 'H', 'P', 'Y', 'M', 'H', 'Z', 'Q', 'V', 'X', 'U', 'G', 'I', 'L', 'E', 'F', 'A', 'X', 'X', 'L', 'F', 'Y', 'I', 'T', 'X', 'W', 'J', 'J', 'U', 'F', 'T', 'I', 'F', 'T', 'H', 'L', 'J', 'Q', 'K', 'J', 'N', 'A', 'J', 'U', 'W', 'F', 'L', 'X', 'R', 'D', 'F', 'D', 'G', 'T', 'S', 'B', 'O', 'F', 'S', 'L', 'Y', 'R', 'H', 'J', 'L', 'Y', 'T', 'U', 'E', 'Y', 'B', 'T', 'Y', 'W', 'J', 'F', 'H', 'L', 'K', 'R', 'J', 'R', 'U', 'M', 'N', 'R', 'F', 'X', 'I', 'F', 'J', 'V', 'L', 'W', 'U', 'B', 'L', 'K', 'L', 'K', 'I', 'K', 'B', 'D', 'J', 'I', 'U', 'G', 'I', 'V', 'G', 'R', 'Y', 'O', 'J', 'U', 'Q', 'H', 'I', 'F', 'U', 'O', 'W', 'C', 'G', 'H', 'X', 'W', 'A', 'S', 'P', 'H', 'Q', 'Y', 'W', 'X', 'Q', 'T', 'U', 'S', 'A', 'S', 'A', 'E', 'J', 'W', 'L', 'J', 'L', 'L', 'K', 'R', 'J', 'S', 'O', 'F', 'G', 'H', 'J', 'X', 'U', 'G', 'I', 'X', 'K', 'J', 'G', 'T', 'Y', 'K', 'K', 'Y', 'I', 'W', 'T', 'W', 'Z', 'J', 'N', 'K', 'F', 'Q', 'K', 'K', 'I', 'K', 'R', 'D', 'L', 'N', 'I', 'G', 'M', 'R', 'O', 'J', 'P', 'X', 'W', 'Q', 'G', 'R', 'U', 'M', 'Y', 'H', 'J', 'B', 'B', 'B', 'H', 'K', 'E', 'J', 'N', 'A', 'T', 'G', 'A', 'X', 'O', 'L', 'J', 'G', 'L', 'M', 'Y', 'K', 'J', 'V', 'M', 'Q', 'N', 'B', 'S', 'J', 'K', 'H', 'L', 'T', 'R', 'E', 'D', 'J', 'X', 'W', 'F', 'W', 'S', 'X', 'N', 'K', 'J', 'D', 'E', 'X', 'B', 'H', 'Z', 'O', 'V', 'L', 'C', 'O', 'J', 'Q', 'G', 'M', 'C', 'G', 'Y', 'V', 'S', 'G', 'I', 'N', 'Y', 'K', 'G', 'B', 'C', 'M', 'B', 'D', 'K', 'J', 'H', 'V', 'W', 'B', 'H', 'Y', 'Y', 'W', 'I', 'X', 'J', 'N', 'H', 'Z', 'B', 'R', 'J', 'Q', 'X', 'P', 'F', 'U', 'A', 'N', 'N', 'A', 'J', 'D', 'D', 'Q', 'C', 'X', 'X', 'V', 'U', 'T', 'L', 'X', 'I', 'V', 'G', 'R', 'Y', 'G', 'T', 'W', 'S', 'G', 'F', 'X', 'A', 'L', 'U', 'Y', 'I', 'K', 'N', 'H', 'K', 'F', 'A', 'T', 'N', 'Q', 'K', 'Y', 'N', 'A', 'J', 'J', 'W', 'W', 'G', 'T', 'S', 'V', 'T', 'J', 'W', 'T', 'Z', 'V', 'W', 'Y', 'B', 'X', 'N', 'U', 'W', 'S', 'W', 'K', 'D', 'S', 'L', 'N', 'I', 'G', 'X', 'B', 'K', 'Y', 'Y', 'F', 'X', 'G', 'A', 'I', 'H', 'H', 'Y', 'V', 'M', 'K', 'Z', 'B', 'H', 'L', 'W', 'S', 'N', 'E', 'D', 'V', 'U', 'W', 'U', 'F', 'G', 'O', 'W', 'R', 'Y', 'L', 'X', 'D', 'Y', 'J', 'M', 'K', 'N', 'J', 'G', 'W', 'I', 'N', 'X', 'P', 'S', 'Y', 'B', 'X', 'R', 'D', 'L', 'N', 'W', 'T', 'Q', 'D', 'F', 'F', 'F', 'R', 'X', 'L', 'K', 'G', 'S', 'T', 'Q', 'O', 'A', 'J', 'X', 'V', 'T', 'G', 'W', 'H', 'L', 'T', 'H', 'N', 'W', 'W', 'M', 'E', 'F', 'L', 'V', 'G', 'U', 'K', 'J', 'S', 'S', 'Y', 'N', 'X', 'W', 'Q', 'K', 'M', 'C', 'W', 'I', 'H', 'F', 'B', 'C', 'M', 'M', 'L', 'F', 'Y', 'B', 'X', 'R', 'H', 'K', 'X', 'U', 'Z', 'J', 'V', 'S', 'S', 'X', 'N', 'X', 'H', 'V', 'Y', 'B', 'X', 'R', 'W', 'G', 'W', 'Y', 'V', 'W', 'H', 'S', 'Y', 'Y', 'M', 'M', 'H', 'E', 'F', 'W', 'A', 'N', 'Q', 'W', 'Z', 'M', 'X', 'I', 'W', 'G', 'J', 'H', 'V', 'W', 'B', 'H', 'Y', 'N', 'A', 'J', 'P', 'L', 'M', 'I', 'L', 'J', 'F', 'G', 'I', 'Y', 'L', 'W', 'H', 'N', 'T', 'F', 'O', 'J', 'G', 'S', 'W', 'I', 'N', 'S', 'G', 'L', 'M', 'Y', 'N', 'X', 'H', 'G', 'K', 'M', 'X', 'H', 'U', 'W', 'Y', 'E', 'X', 'D', 'V', 'L', 'M', 'U', 'M', 'B', 'H', 'J', 'J', 'M', 'A', 'F', 'U', 'W', 'I', 'U', 'F', 'T', 'Q', 'Y', 'Y', 'B', 'H', 'X', 'H', 'O', 'M', 'I', 'G', 'J', 'H', 'V', 'J', 'X', 'M', 'T', 'F', 'G', 'R', 'G', 'N', 'S', 'L', 'U', 'F', 'N', 'X', 'X', 'H', 'U', 'Z', 'L', 'X', 'Q', 'B', 'L', 'M', 'Y', 'L', 'J', 'D', 'J', 'J', 'E', 'G', 'T', 'Z', 'F', 'F', 'M', 'L', 'D', 'P', 'E', 'J', 'N', 'K', 'N', 'F', 'W', 'S', 'W', 'K', 'D', 'S', 'L', 'N', 'I', 'G', 'X', 'B', 'K', 'Y', 'Y', 'F', 'X', 'D', 'F', 'I', 'B', 'T', 'A', 'H', 'S', 'B', 'Y', 'T', 'P', 'Q', 'W', 'X', 'M', 'B', 'S', 'W', 'Z', 'F', 'N', 'X', 'A', 'H', 'J', 'D', 'I', 'G', 'J', 'L', 'F', 'A', 'I', 'E', 'A', 'H', 'V', 'M', 'U', 'L', 'Y', 'R', 'H', 'T', 'M', 'L', 'J', 'V', 'K', 'Y', 'B', 'X', 'X', 'D', 'E', 'J', 'M', 'X', 'Y', 'R', 'X', 'X', 'Y', 'V', 'W', 'H', 'L', 'P', 'Y', 'R', 'X'], 'SECRET')
 	encryptionmakesthemodernworldgoroundeverytimeyoumakeamobilephonecallbuysomethingwithacreditcardinashoporontheweborevengetcashfromanatmencryptionbestowsuponthattransactiontheconfidentialityandsecuritytomakeitpossibleifyouconsiderelectronictransactionsandonlinepaymentsallthosewouldnotbepossiblewithoutencryptionsaiddrmarkmanulisaseniorlecturerincryptographyattheuniversityofsurreyatitssimplestencryptionisallabouttransformingintelligiblenumbersortextsoundsandimagesintoastreamofnonsensetherearemanymanywaystoperformthattransformationsomestraightforwardandsomeverycomplexmostinvolveswappinglettersfornumbersandusemathstodothetransformationhowevernomatterwhichmethodisusedtheresultingscrambleddatastreamshouldgivenohintsabouthowitwasencryptedduringworldwariithealliesscoredsomenotablevictoriesagainstthegermansbecausetheirencryptionsystemsdidnotsufficientlyscramblemessagesrigorousmathematicalanalysisbyalliedcodecrackerslaidbarepatternshiddenwithinthemessagesandusedthemtorecreatethemachineusedtoencryptthemthosecodesrevolvedaroundtheuseofsecretkeysthatweresharedamongthosewhoneededtocommunicatesecurelytheseareknownassymmetricencryptionsystemsandhaveaweaknessinthateveryoneinvolvedhastopossessthesamesetofsecretkeys
 	"""
-	keyString = keyString.upper()
-	keyLength = len(keyString)
-	decryptedCharList = []
-	subKeyIndex = 0
-	for char in charList:
-		subKeyLetter = keyString[subKeyIndex]
-		subKey = cipher_utils.cipherLetterToOrdinal(subKeyLetter) + 1
-		cipherOrdinal = cipher_utils.cipherLetterToOrdinal(char)
-		plainTextOrdinal = (cipherOrdinal - subKey) % 26
-		plainTextLetter = cipher_utils.ordinalToClearLetter(plainTextOrdinal)
-		decryptedCharList.append(plainTextLetter)
-		subKeyIndex+=1
-		logger.debug('SubKey %s (%s - %s):\tcipher char: %s (%s)\tplaintext char: %s (%s)' % (subKeyIndex, subKey, subKeyLetter, char, cipherOrdinal+1, plainTextLetter, plainTextOrdinal+1))
-		if subKeyIndex == keyLength:
-			subKeyIndex = 0
-	return ''.join(decryptedCharList)
+	cipherText = cipher_utils.CipherText(charList)
+	keyOrdinals = cipher_utils.CipherText(keyString).letters().ordinals
+	logger.debug('Decrypting %s cipher chars with key %s', len(cipherText), keyString.upper())
+	plainOrdinals = decryptVigenereBatch(cipherText, [keyOrdinals])[0]
+	return cipherText.withOrdinals(plainOrdinals).toLower()
+
+# DECRYPT_TABLES[k] undoes the Caesar shift of the subkey with ordinal k (A = a shift of 1)
+DECRYPT_TABLES = [cipher_utils.SHIFT_TABLES[-(keyOrdinal + 1) % 26] for keyOrdinal in range(26)]
+
+def decryptVigenereBatch(charList, keys, scorer=None):
+	""" (list, list, function) -> list
+	
+	Decrypt the passed ciphertext list charList under every key in keys in one pass.
+	Each key may be a str, or a bytes-like row of subkey ordinals (A = 0 ... Z = 25),
+	so a whole key matrix can be passed as a list of rows. The ciphertext columns
+	are extracted once per key length and shared by every key in the batch.
+	Any non-letters in charList are passed through as cipher_utils.NON_LETTER.
+	
+	Without a scorer, return one bytes row of plaintext ordinals per key (a candidates x length
+	array), which cipher_utils.CipherText.fromOrdinals() can decode. With a scorer, call
+	scorer(plainOrdinals) for each candidate instead and return the list of scores, so the
+	plaintext rows are never kept and never decoded into strings.
+	
+	>>> decryptVigenereBatch('TFDSFU', ['SECRET', 'AAAAAA'])
+	[b'\\x00\\x00\\x00\\x00\\x00\\x00', b'\\x12\\x04\\x02\\x11\\x04\\x13']
+	"""
+	cipherText = cipher_utils.CipherText(charList)
+	textLength = len(cipherText)
+	columnsByKeyLength = {}
+	results = []
+	for key in keys:
+		if isinstance(key, str):
+			key = cipher_utils.CipherText(key).letters().ordinals
+		keyLength = len(key)
+		if keyLength == 0:
+			raise ValueError('Vigenere keys must contain at least one letter')
+		columns = columnsByKeyLength.get(keyLength)
+		if columns is None:
+			columns = [column.tobytes() for column in cipherText.columns(keyLength)]
+			columnsByKeyLength[keyLength] = columns
+		plainOrdinals = bytearray(textLength)
+		for subKeyIndex in range(keyLength):
+			plainOrdinals[subKeyIndex::keyLength] = columns[subKeyIndex].translate(DECRYPT_TABLES[key[subKeyIndex]])
+		if scorer is None:
+			results.append(bytes(plainOrdinals))
+		else:
+			results.append(scorer(plainOrdinals))
+	return results
+
+
+def solveVigenere(charList, period, topN=5, frequencies=None):
+	""" (list, integer, integer, list) -> list
+	
+	Recover the most likely Vigenere keys of length period for the ciphertext charList.
+	Every column is counted once, and all 26 shifts of each column are scored by their
+	chi-squared statistic against the English letter frequencies (or frequencies, if given),
+	so no plaintext is ever decrypted. Return the topN keys with the lowest total
+	chi-squared, as a list of (total chi-squared, key) tuples, best first.
+	
+	>>> solveVigenere(cipher_utils.readFile('example.txt'), 6, 1)[0][1]
+	'SECRET'
+	"""
+	if frequencies is None:
+		frequencies = cipher_utils.letterFrequencies()
+	cipherText = cipher_utils.CipherText(charList).letters()
+	shiftTables = []
+	for column in cipherText.columns(period):
+		columnText = cipher_utils.CipherText.fromOrdinals(column.tobytes())
+		shiftTables.append(cipher_utils.chiSquaredShiftTable(columnText.letterCounts(), frequencies))
+	# Enumerate the combinations of column shifts in order of increasing total chi-squared,
+	# starting from the best shift of every column
+	rankedShifts = [sorted(range(26), key=table.__getitem__) for table in shiftTables]
+	ranks = (0,) * period
+	candidates = [(sum(table[shifts[0]] for table, shifts in zip(shiftTables, rankedShifts)), ranks)]
+	seen = set([ranks])
+	keys = []
+	while candidates and len(keys) < topN:
+		score, ranks = heapq.heappop(candidates)
+		# A shift of s is the subkey with ordinal s - 1 (A = a shift of 1)
+		key = ''.join(cipher_utils.integerToChr((rankedShifts[column][rank] - 1) % 26) for column, rank in enumerate(ranks))
+		logger.info('key %s : chi-squared = %s', key, score)
+		keys.append((score, key))
+		for column in range(period):
+			rank = ranks[column]
+			if rank == 25:
+				continue
+			nextRanks = ranks[:column] + (rank + 1,) + ranks[column + 1:]
+			if nextRanks not in seen:
+				seen.add(nextRanks)
+				table = shiftTables[column]
+				nextScore = score - table[rankedShifts[column][rank]] + table[rankedShifts[column][rank + 1]]
+				heapq.heappush(candidates, (nextScore, nextRanks))
+	return keys
+
+def crackVigenere(charList, maxPeriod=20, topN=5):
+	""" (list, integer, integer) -> list
+	
+	Automatically recover the most likely keys for the Vigenere ciphertext charList, detecting the
+	key length with detectKeyLength and then solving it with solveVigenere. If the best key found
+	is a repetition of a shorter key (the detected length was a multiple of the key length),
+	the keys of the shorter length are solved instead.
+	Return a list of (total chi-squared, key) tuples, best first.
+	
+	>>> crackVigenere(cipher_utils.readFile('example.txt'), 12, 1)
+	[(162.76767888725848, 'SECRET')]
+	>>> crackVigenere(cipher_utils.readFile('example.txt'), 300, 1)
+	[(162.76767888725848, 'SECRET')]
+	"""
+	cipherText = cipher_utils.CipherText(charList).letters()
+	period = detectKeyLength(cipherText, maxPeriod)[0][0]
+	logger.info('Most likely key length = %s', period)
+	keys = solveVigenere(cipherText, period, topN)
+	if keys:
+		unit = smallestRepeatingUnit(keys[0][1])
+		if len(unit) < period:
+			logger.info('Key %s repeats %s, so the key length is %s', keys[0][1], unit, len(unit))
+			keys = solveVigenere(cipherText, len(unit), topN)
+	return keys
 
+def smallestRepeatingUnit(key):
+	""" (str) -> str
+	
+	Return the shortest string which, repeated, makes up the whole of key
+	
+	>>> smallestRepeatingUnit('SECRETSECRETSECRET'), smallestRepeatingUnit('SECRET')
+	('SECRET', 'SECRET')
+	"""
+	for length in range(1, len(key)):
+		if len(key) % length == 0 and key[:length] * (len(key) // length) == key:
+			return key[:length]
+	return key
 
 def main():
 	# When run as a main programme, work through the example at the end of the
@@ -115,9 +349,9 @@ def main():
 	# University of Southampton (A Vigenere cipher)
 	print('Ensure that example.txt is present in the same directory as vigenere.py')
 	input('Hit any key to continue...')
-	print('Reading in file example.txt and removing all whitespace characters...')
-	ciphertext = cipher_utils.stripWhitespace(cipher_utils.readFile('example.txt'))
-	cipherlist=list(ciphertext)
+	print('Reading in the letters of file example.txt...')
+	ciphertext = cipher_utils.readCipherText('example.txt')
+	cipherlist = ciphertext
 	print('Performing standard frequency analysis on list:')
 	freq = cipher_utils.frequencyAnalysis(cipherlist)
 	sortedFreq = cipher_utils.sortedFrequency(freq)
@@ -157,12 +391,20 @@ def main():
 	solution = decryptVigenere(ciphertext, deriveVigenereKeyPhrase('XJHWJY'))
 	print(solution)
 	cipher_utils.writeFile('solution.txt', solution)
+	print('Finally, recover the key automatically, scoring every shift of every subkey against English letter frequencies')
+	input('Hit any key to continue...')
+	keys = crackVigenere(ciphertext, 12)
+	for score, key in keys:
+		print('%s\t%s' % (key, score))
+	solution = decryptVigenere(ciphertext, keys[0][1])
+	print(solution)
+	cipher_utils.writeFile('solution.txt', solution)
 	logger.setLevel(logger.ERROR)
 
-# Always perform a sanity check first on the known example cipher:
-print('Checking decryption logic on vigenere module...')
-logger.setLevel(logger.ERROR)
-if decryptVigenere(cipher_utils.stripWhitespace('''
+# Sanity checks on the known example cipher, run on demand by self_test
+@self_test.register('decryption logic')
+def _selfTestDecryption():
+	self_test.check(decryptVigenere(cipher_utils.stripWhitespace('''
 XSFJD JMNRF RUDJV LMYFT GWWHP TUDIA HWRMS XXAHJ DNBRH
 QTOFF NWFGH GLDJJ ATQWH UEQEM DMHRH LMCGL ZAYBT HUWIC
 MHDJI CGFVZ TJHWR FYBXB HTTLX AHFLY MHDKM ZKTPS SUMRH
@@ -190,18 +432,13 @@ GKMXH UWYEX DVLMU MBHJJ MAFUW IUFTQ YYBHX HOMIG JHVJX
 MTFGR GNSLU FNXXH UZLXQ BLMYL JDJJE GTZFF MLDPE JNKNF
 WSWKD SLNIG XBKYY FXDFI BTAHS BYTPQ WXMBS WZFNX AHJDI
 GJLFA IEAHV MULYR HTMLJ VKYBX XDEJM XYRXX YVWHL PYRX
-'''), 'SECRET') != 'encryptionmakesthemodernworldgoroundeverytimeyoumakeamobilephonecallbuysomethingwithacreditcardinashoporontheweborevengetcashfromanatmencryptionbestowsuponthattransactiontheconfidentialityandsecuritytomakeitpossibleifyouconsiderelectronictransactionsandonlinepaymentsallthosewouldnotbepossiblewithoutencryptionsaiddrmarkmanulisaseniorlecturerincryptographyattheuniversityofsurreyatitssimplestencryptionisallabouttransformingintelligiblenumbersortextsoundsandimagesintoastreamofnonsensetherearemanymanywaystoperformthattransformationsomestraightforwardandsomeverycomplexmostinvolveswappinglettersfornumbersandusemathstodothetransformationhowevernomatterwhichmethodisusedtheresultingscrambleddatastreamshouldgivenohintsabouthowitwasencryptedduringworldwariithealliesscoredsomenotablevictoriesagainstthegermansbecausetheirencryptionsystemsdidnotsufficientlyscramblemessagesrigorousmathematicalanalysisbyalliedcodecrackerslaidbarepatternshiddenwithinthemessagesandusedthemtorecreatethemachineusedtoencryptthemthosecodesrevolvedaroundtheuseofsecretkeysthatweresharedamongthosewhoneededtocommunicatesecurelytheseareknownassymmetricencryptionsystemsandhaveaweaknessinthateveryoneinvolvedhastopossessthesamesetofsecretkeys':
-	print('Error testing decryptVigenere(charList, keyString) method!!! Check your code before continuing...')
-	sys.exit()
-elif deriveVigenereKeyPhrase('XJHWJY') != 'SECRET':
-	print('Error testing deriveVigenereKeyPhrase(frequentChars) method!!! Check your code before continuing...')
-	sys.exit()
-else:
-	print('decryption logic OK.')
-logger.setLevel(logger.ERROR)
+'''), 'SECRET') == 'encryptionmakesthemodernworldgoroundeverytimeyoumakeamobilephonecallbuysomethingwithacreditcardinashoporontheweborevengetcashfromanatmencryptionbestowsuponthattransactiontheconfidentialityandsecuritytomakeitpossibleifyouconsiderelectronictransactionsandonlinepaymentsallthosewouldnotbepossiblewithoutencryptionsaiddrmarkmanulisaseniorlecturerincryptographyattheuniversityofsurreyatitssimplestencryptionisallabouttransformingintelligiblenumbersortextsoundsandimagesintoastreamofnonsensetherearemanymanywaystoperformthattransformationsomestraightforwardandsomeverycomplexmostinvolveswappinglettersfornumbersandusemathstodothetransformationhowevernomatterwhichmethodisusedtheresultingscrambleddatastreamshouldgivenohintsabouthowitwasencryptedduringworldwariithealliesscoredsomenotablevictoriesagainstthegermansbecausetheirencryptionsystemsdidnotsufficientlyscramblemessagesrigorousmathematicalanalysisbyalliedcodecrackerslaidbarepatternshiddenwithinthemessagesandusedthemtorecreatethemachineusedtoencryptthemthosecodesrevolvedaroundtheuseofsecretkeysthatweresharedamongthosewhoneededtocommunicatesecurelytheseareknownassymmetricencryptionsystemsandhaveaweaknessinthateveryoneinvolvedhastopossessthesamesetofsecretkeys', 'decryptVigenere(charList, keyString)')
+	self_test.check(deriveVigenereKeyPhrase('XJHWJY') == 'SECRET', 'deriveVigenereKeyPhrase(frequentChars)')
 
 # if vigenere.py is run, instead of being imported as a module,
 # call the main() function
 
 if __name__ == '__main__':
+	if '--self-test' in sys.argv:
+		self_test.main(['vigenere'])
 	main()